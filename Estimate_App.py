@@ -27,6 +27,7 @@ if saved_files:
 
         # 기존 입력 화면 기능 유지 → Session State만 반영
         st.session_state['loaded_items'] = loaded_df[loaded_df['항목코드'].notnull()].to_dict(orient='records')
+        st.session_state['loaded_quantities'] = {item['항목코드']: item['수량'] for item in st.session_state['loaded_items']}
         st.session_state['base_filename'] = selected_file.replace(".csv", "")
 
         meta_row = loaded_df.iloc[0]
@@ -91,6 +92,8 @@ with col4:
 st.subheader("1️⃣ 견적 항목 선택")
 categories = df['분류'].unique()
 selected_items = []
+# 불러온 견적서의 항목코드 → 수량 (불러올 때 한 번만 생성)
+loaded_quantities = st.session_state.get('loaded_quantities', {})
 
 for cat in categories:
     with st.expander(f"📂 {cat} 항목 보기"):
@@ -101,11 +104,7 @@ for cat in categories:
                 st.markdown(f"**[{row['항목코드']}] {row['품목명']}**")
                 st.markdown(f"{row['설명']}")
             with col2:
-                default_qty = 0
-                if 'loaded_items' in st.session_state:
-                    for item in st.session_state['loaded_items']:
-                        if item['항목코드'] == row['항목코드']:
-                            default_qty = item['수량']
+                default_qty = loaded_quantities.get(row['항목코드'], 0)
                 qty = st.number_input(f"수량 ({row['단위']}) - {row['항목코드']}", min_value=0, step=1, value=default_qty, key=f"qty_{cat}_{i}")
                 if qty > 0:
                     selected_items.append({
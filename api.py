@@ -0,0 +1,227 @@
+# CRM 등 외부 시스템 연동용 견적서 HTTP API (ASGI)
+#
+# 실행: uvicorn api:app --host 0.0.0.0 --port 8000
+# DB/렌더링 작업은 이벤트 루프를 막지 않도록 크기가 제한된 스레드 풀에서 실행합니다.
+
+import asyncio
+import datetime
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import PlainTextResponse, Response
+from pydantic import BaseModel, conint
+
+from data_manager import COMPANY_FIELDS, CUSTOMER_FIELDS, DataManager
+from database import Database
+from estimate_handler import EstimateHandler
+from metrics import metrics
+from pricing import price_quote, quantities_from_codes
+from render_cache import get_render_cache
+
+API_DB_FILE = os.environ.get("QUOTE_DB_FILE", "quotation.db")
+# DB/렌더링 작업 스레드 수 (SQLite 쓰기는 어차피 하나씩 처리되므로 크게 늘릴 필요 없음)
+API_WORKERS = int(os.environ.get("QUOTE_API_WORKERS", "8"))
+HISTORY_MAX_LIMIT = 500
+
+
+class EstimateIn(BaseModel):
+    """견적서 생성/버전 추가 요청
+
+    meta_data는 화면 입력과 같은 고객/당사 정보 필드(고객사명, 건명, 견적일자 ...)이며,
+    items는 {항목코드: 수량(0 이상)}으로 단가/금액은 기초 견적 항목 테이블로 계산합니다.
+    """
+    meta_data: Dict[str, str]
+    items: Dict[str, conint(ge=0)]
+    is_final: bool = False
+
+
+class QuotationService:
+    """API 요청을 DataManager/EstimateHandler 호출로 처리 (작업 스레드에서 실행)"""
+    def __init__(self, data_manager=None, estimate_handler=None, db_file=API_DB_FILE):
+        self.db_file = db_file
+        self._data_manager = data_manager
+        self._estimate_handler = estimate_handler
+        self._lock = threading.Lock()
+
+    @property
+    def data_manager(self):
+        # DB 파일은 첫 요청에서 열어 import만으로 quotation.db가 생성되지 않도록 함
+        if self._data_manager is None:
+            with self._lock:
+                if self._data_manager is None:
+                    self._data_manager = DataManager(db=Database(self.db_file))
+        return self._data_manager
+
+    @property
+    def estimate_handler(self):
+        if self._estimate_handler is None:
+            with self._lock:
+                if self._estimate_handler is None:
+                    self._estimate_handler = EstimateHandler(render_cache=get_render_cache())
+        return self._estimate_handler
+
+    def save(self, payload, parent_id=None):
+        """견적서 저장 (parent_id가 있으면 새 버전)"""
+        meta_data = {field: '' for field in CUSTOMER_FIELDS + COMPANY_FIELDS}
+        meta_data.update(payload.meta_data)
+        if not meta_data['견적일자']:
+            meta_data['견적일자'] = datetime.date.today().isoformat()
+
+        catalog = self.data_manager.load_catalog()
+        try:
+            quantities = quantities_from_codes(catalog, payload.items)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        items, total = price_quote(catalog, quantities)
+        if not items:
+            raise HTTPException(status_code=400, detail="수량이 있는 견적 항목이 없습니다.")
+
+        if parent_id is not None and not self.data_manager.get_estimate_version(parent_id):
+            raise HTTPException(status_code=404, detail=f"견적서 {parent_id}를 찾을 수 없습니다.")
+
+        # 버전 번호는 저장 트랜잭션에서 체인의 MAX(version_num) + 1로 정해지므로 파일명도 그때 생성
+        estimate_id = self.data_manager.save_estimate(
+            {**meta_data, '총금액': total, 'is_final': payload.is_final},
+            items,
+            lambda version: DataManager.generate_filename(meta_data, version),
+            parent_id
+        )
+        version = "final" if payload.is_final else f"v{self.data_manager.get_estimate_version(estimate_id)}"
+        filename = DataManager.generate_filename(meta_data, version)
+        return {'estimate_id': estimate_id, 'filename': filename, 'version': version,
+                'total': total, 'items': items}
+
+    def load(self, estimate_id):
+        """견적서 조회 (없으면 404)"""
+        estimate_data, items = self.data_manager.load_estimate(estimate_id)
+        if estimate_data is None:
+            raise HTTPException(status_code=404, detail=f"견적서 {estimate_id}를 찾을 수 없습니다.")
+        return estimate_data, DataManager.document_items(items)
+
+    def history(self, limit, cursor, customer, date_from, date_to, latest_only):
+        """견적서 이력 한 페이지와 다음 페이지 커서"""
+        after_cursor = None
+        if cursor:
+            created_at, _, estimate_id = cursor.rpartition('|')
+            if not created_at or not estimate_id.isdigit():
+                raise HTTPException(status_code=400, detail="잘못된 cursor 값입니다.")
+            after_cursor = (created_at, int(estimate_id))
+
+        history = self.data_manager.get_estimate_history(
+            limit=limit + 1,
+            after_cursor=after_cursor,
+            customer=customer,
+            date_from=date_from,
+            date_to=date_to,
+            latest_only=latest_only
+        )
+        next_cursor = None
+        if len(history) > limit:
+            history = history[:limit]
+            created_at, estimate_id = Database.history_cursor(history[-1])
+            next_cursor = f"{created_at}|{estimate_id}"
+        return {'items': history, 'next_cursor': next_cursor}
+
+    def search(self, query, limit, latest_only):
+        """전문 검색 결과 (관련도순, truncated면 최근 후보 중에서만 순위를 매긴 결과)"""
+        return self.data_manager.search_estimates(query, limit=limit, latest_only=latest_only)
+
+    def version(self, estimate_id):
+        """견적서 버전 번호 (없으면 404)"""
+        version = self.data_manager.get_estimate_version(estimate_id)
+        if not version:
+            raise HTTPException(status_code=404, detail=f"견적서 {estimate_id}를 찾을 수 없습니다.")
+        return {'estimate_id': estimate_id, 'version': version}
+
+    def render(self, estimate_id, kind):
+        """저장된 견적서를 PDF/HTML bytes로 생성"""
+        estimate_data, items = self.load(estimate_id)
+        customer_info, company_info = DataManager.split_estimate_data(estimate_data)
+        # 저장된 총금액 사용 (문서 항목 금액을 다시 합산하지 않음)
+        total = estimate_data['총금액']
+        if isinstance(total, float) and total.is_integer():
+            total = int(total)
+        if kind == 'pdf':
+            return self.estimate_handler.generate_pdf_bytes(customer_info, company_info, items, total)
+        return self.estimate_handler.generate_html_bytes(customer_info, company_info, items, total)
+
+
+def create_app(service=None, workers=API_WORKERS):
+    """API 앱 생성 (테스트/벤치마크에서는 별도 DB의 service를 넘김)"""
+    service = service or QuotationService()
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="quote-api")
+    app = FastAPI(title="견적서 API")
+
+    async def run(func, *args):
+        """블로킹 작업을 작업 스레드 풀에서 실행"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, functools.partial(func, *args))
+
+    @app.on_event("shutdown")
+    def shutdown():
+        executor.shutdown(wait=False)
+
+    @app.post("/estimates", status_code=201)
+    async def create_estimate(payload: EstimateIn):
+        return await run(service.save, payload)
+
+    @app.post("/estimates/{estimate_id}/versions", status_code=201)
+    async def add_version(estimate_id: int, payload: EstimateIn):
+        return await run(service.save, payload, estimate_id)
+
+    @app.get("/estimates")
+    async def estimate_history(
+        limit: int = Query(50, ge=1, le=HISTORY_MAX_LIMIT),
+        cursor: Optional[str] = None,
+        customer: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        latest_only: bool = False,
+    ):
+        return await run(service.history, limit, cursor, customer, date_from, date_to, latest_only)
+
+    # /estimates/{estimate_id}보다 먼저 등록해야 "search"가 ID로 해석되지 않음
+    @app.get("/estimates/search")
+    async def search_estimates(
+        q: str = Query(..., min_length=1),
+        limit: int = Query(50, ge=1, le=HISTORY_MAX_LIMIT),
+        latest_only: bool = False,
+    ):
+        return await run(service.search, q, limit, latest_only)
+
+    @app.get("/estimates/{estimate_id}")
+    async def get_estimate(estimate_id: int):
+        estimate_data, items = await run(service.load, estimate_id)
+        return {'estimate': estimate_data, 'items': items}
+
+    @app.get("/estimates/{estimate_id}/version")
+    async def get_version(estimate_id: int):
+        return await run(service.version, estimate_id)
+
+    @app.get("/estimates/{estimate_id}/pdf")
+    async def get_pdf(estimate_id: int):
+        data = await run(service.render, estimate_id, 'pdf')
+        return Response(content=data, media_type="application/pdf")
+
+    @app.get("/estimates/{estimate_id}/html")
+    async def get_html(estimate_id: int):
+        data = await run(service.render, estimate_id, 'html')
+        return Response(content=data, media_type="text/html; charset=utf-8")
+
+    @app.get("/metrics")
+    async def metrics_text():
+        """Prometheus 수집용 작업 지표"""
+        return PlainTextResponse(metrics.prometheus_text(), media_type="text/plain; version=0.0.4")
+
+    @app.get("/metrics.json")
+    async def metrics_json():
+        return metrics.snapshot()
+
+    return app
+
+
+app = create_app()
@@ -0,0 +1,119 @@
+# 견적서 API 부하 벤치마크: httpx AsyncClient로 앱을 프로세스 안에서 호출 (네트워크 없음)
+#
+# 사용법: python -m benchmarks.bench_api [--requests 500] [--concurrency 1 16 64] [--workers 8] [--font arialuni.ttf]
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import httpx
+
+from api import QuotationService, create_app
+from catalog import load_catalog
+from data_manager import DataManager
+from database import Database
+from estimate_handler import EstimateHandler
+from pdf_renderer import PdfRenderer
+
+META_DATA = {
+    '고객사명': '벤치마크고객', '건명': 'IVR 구축', '담당자명': '홍길동', '직위': '과장',
+    '이메일': 'hong@example.com', '전화번호': '010-0000-0000', '견적일자': '2024-01-01',
+    '납품기간': '발주 후 30일', '하자기간': '구축 후 1년',
+    '견적담당자명': '김철수', '견적담당자직위': '대리', '견적담당자이메일': 'kim@example.com',
+    '견적담당자전화번호': '02-0000-0000', '특이사항': ''
+}
+
+
+def make_payload(codes, i):
+    """합성 견적 요청 (항목 5개, 요청마다 수량이 다름)"""
+    return {'meta_data': {**META_DATA, '고객사명': f"고객{i % 50}"},
+            'items': {code: 1 + (i + n) % 5 for n, code in enumerate(codes[:5])}}
+
+
+async def measure(client, count, concurrency, request):
+    """request(client, i)를 concurrency개씩 동시에 count번 호출, (초당 처리량, 지연 시간 목록) 반환"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i):
+        async with semaphore:
+            started = time.perf_counter()
+            response = await request(client, i)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                raise RuntimeError(f"{response.status_code}: {response.text[:200]}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(count)))
+    elapsed = time.perf_counter() - started
+    return count / elapsed, sorted(latencies)
+
+
+def percentile(sorted_values, ratio):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * ratio))]
+
+
+async def run(count, concurrency_levels, workers, font_file):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        pdf_renderer = PdfRenderer(font_file) if font_file else None
+        service = QuotationService(DataManager(db=db), EstimateHandler(pdf_renderer=pdf_renderer))
+        app = create_app(service, workers=workers)
+        codes = list(load_catalog(service.data_manager.base_csv_file).by_code)
+        ids = []
+
+        async def create(client, i):
+            response = await client.post("/estimates", json=make_payload(codes, i))
+            ids.append(response.json().get('estimate_id'))
+            return response
+
+        async def add_version(client, i):
+            return await client.post(f"/estimates/{ids[i % len(ids)]}/versions", json=make_payload(codes, i + 1))
+
+        async def get_estimate(client, i):
+            return await client.get(f"/estimates/{ids[i % len(ids)]}")
+
+        async def history(client, i):
+            return await client.get("/estimates", params={'limit': 50, 'customer': f"고객{i % 50}"})
+
+        async def version(client, i):
+            return await client.get(f"/estimates/{ids[i % len(ids)]}/version")
+
+        async def html(client, i):
+            return await client.get(f"/estimates/{ids[i % len(ids)]}/html")
+
+        async def pdf(client, i):
+            return await client.get(f"/estimates/{ids[i % len(ids)]}/pdf")
+
+        scenarios = [('POST /estimates', create), ('POST /estimates/{id}/versions', add_version),
+                     ('GET /estimates/{id}', get_estimate), ('GET /estimates', history),
+                     ('GET /estimates/{id}/version', version), ('GET /estimates/{id}/html', html)]
+        if font_file:
+            scenarios.append(('GET /estimates/{id}/pdf', pdf))
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            print(f"{'endpoint':<32}{'동시성':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+            for name, request in scenarios:
+                for concurrency in concurrency_levels:
+                    throughput, latencies = await measure(client, count, concurrency, request)
+                    print(f"{name:<32}{concurrency:>6}{throughput:>10.1f}"
+                          f"{percentile(latencies, 0.5) * 1000:>10.2f}{percentile(latencies, 0.95) * 1000:>10.2f}"
+                          f"{percentile(latencies, 0.99) * 1000:>10.2f}")
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="견적서 API 동시 부하 벤치마크")
+    parser.add_argument("--requests", type=int, default=500, help="시나리오별 요청 수")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64], help="동시 요청 수")
+    parser.add_argument("--workers", type=int, default=8, help="API 작업 스레드 수")
+    parser.add_argument("--font", default=None, help="PDF 폰트(TTF) 파일 (지정 시 PDF 시나리오 포함)")
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.concurrency, args.workers, args.font))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# 버전 변경분(델타) 저장의 DB 크기/불러오기 지연 벤치마크
+#
+# 사용법: python -m benchmarks.bench_delta [--chains 1000] [--versions 30] [--intervals 5 10 20]
+#
+# 협상이 길어지는 견적을 흉내 내어 체인마다 v1 이후 버전에서 수량 1~2개(가끔 건명)만 바꿔 저장하고,
+# 전체 저장 DB와 스냅샷 주기별 델타 저장 DB의 파일 크기와 load_estimate 지연 시간을 비교합니다.
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from benchmarks.suite import CATALOG_FILE, SyntheticData, timed
+from catalog import load_catalog
+from database import Database, DatabaseConfig
+
+
+def negotiate(data, items):
+    """직전 버전 항목에서 수량 1~2개를 바꾸거나 항목 하나를 추가/삭제한 다음 버전 항목"""
+    rng = data.rng
+    items = [dict(item) for item in items]
+    for _ in range(rng.randint(1, 2)):
+        action = rng.random()
+        if action < 0.8 or len(items) < 2:
+            item = rng.choice(items)
+            item['수량'] = rng.randint(1, 10)
+            item['금액'] = item['수량'] * item['단가']
+        elif action < 0.9:
+            items.pop(rng.randrange(len(items)))
+        else:
+            codes = {item['항목코드'] for item in items}
+            row = rng.choice([row for row in data.rows if row['항목코드'] not in codes])
+            items.insert(rng.randrange(len(items) + 1), {
+                '항목코드': row['항목코드'], '품목명': row['품목명'], '단위': row['단위'],
+                '수량': 1, '단가': int(row['기본단가']), '금액': int(row['기본단가'])})
+    return items
+
+
+def build(path, config, chains, versions, catalog, seed):
+    """체인 chains개 x 버전 versions개 DB 생성 후 (저장 소요 시간, 버전별 ID 목록) 반환"""
+    data = SyntheticData(catalog, seed)
+    db = Database(path, config)
+    ids_by_version = [[] for _ in range(versions)]
+    started = time.perf_counter()
+    for _ in range(chains):
+        record = data.record(data.customer_info(), "v1")
+        customer_info, items = record['customer_info'], record['items']
+        parent_id = None
+        for version in range(versions):
+            if version:
+                items = negotiate(data, items)
+                if data.rng.random() < 0.1:
+                    customer_info = {**customer_info, '건명': f"{customer_info['건명']} 변경{version}"}
+            parent_id = db.save_estimate(customer_info, record['company_info'], items,
+                                         sum(item['금액'] for item in items),
+                                         f"{customer_info['고객사명']}_v{version + 1}", parent_id)
+            ids_by_version[version].append(parent_id)
+    elapsed = time.perf_counter() - started
+    db.close()
+    return elapsed, ids_by_version
+
+
+def file_size(path):
+    """WAL 반영 및 VACUUM 후 DB 파일 크기 (bytes)"""
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.execute("VACUUM")
+    conn.close()
+    return os.path.getsize(path)
+
+
+def run(chains, versions, intervals, repeat, seed, data_dir):
+    catalog = load_catalog(CATALOG_FILE)
+    modes = [("전체 저장", DatabaseConfig(delta_storage=False))]
+    modes += [(f"델타 (주기 {interval})", DatabaseConfig(delta_storage=True, snapshot_interval=interval))
+              for interval in intervals]
+    probes = sorted({0, versions // 2, versions - 1})
+
+    results = []
+    reference = None
+    for label, config in modes:
+        path = os.path.join(data_dir, f"delta_{len(results)}.db")
+        save_sec, ids_by_version = build(path, config, chains, versions, catalog, seed)
+        size = file_size(path)
+
+        # 모든 모드가 같은 시드로 만들어지므로 같은 위치의 버전 내용이 같아야 함
+        rng = random.Random(seed)
+        sample = [rng.randrange(chains) for _ in range(repeat)]
+        db = Database(path, config)
+        loaded = [db.load_estimate(ids_by_version[version][i]) for version in probes for i in sample[:50]]
+        if reference is None:
+            reference = loaded
+        assert loaded == reference, f"{label}: 복원한 버전이 전체 저장본과 다릅니다"
+
+        loads = {}
+        for version in probes:
+            loads[version] = timed(db.load_estimate,
+                                   [(ids_by_version[version][i],) for i in sample])['p50_ms']
+        db.close()
+        results.append({'mode': label, 'size': size, 'save_sec': save_sec, 'loads': loads})
+        os.remove(path)
+    return results, probes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="버전 변경분(델타) 저장 벤치마크")
+    parser.add_argument("--chains", type=int, default=1000, help="견적 체인 수")
+    parser.add_argument("--versions", type=int, default=30, help="체인당 버전 수")
+    parser.add_argument("--intervals", type=int, nargs='+', default=[5, 10, 20], help="스냅샷 주기")
+    parser.add_argument("--repeat", type=int, default=300, help="버전별 불러오기 측정 횟수")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_delta_") as data_dir:
+        results, probes = run(args.chains, args.versions, args.intervals, args.repeat, args.seed, data_dir)
+
+    versions = args.chains * args.versions
+    print(f"체인 {args.chains:,}개 x {args.versions}버전 = {versions:,}건")
+    header = "".join(f"{f'v{version + 1} 불러오기':>14}" for version in probes)
+    print(f"{'저장 방식':<14} {'DB 크기(MB)':>12} {'건당(B)':>9} {'절감':>7} {'저장(s)':>9}{header}")
+    full_size = results[0]['size']
+    for r in results:
+        loads = "".join(f"{r['loads'][version]:>12.3f}ms" for version in probes)
+        print(f"{r['mode']:<14} {r['size'] / 1e6:>12.2f} {r['size'] / versions:>9.0f} "
+              f"{1 - r['size'] / full_size:>7.0%} {r['save_sec']:>9.2f}{loads}")
+
+
+if __name__ == "__main__":
+    main()
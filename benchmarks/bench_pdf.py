@@ -0,0 +1,129 @@
+# 견적서 PDF 생성 벤치마크: 변경 전 generate_pdf(매번 add_font) vs PdfRenderer(폰트 메트릭 캐시 + GlyphSubset)
+#
+# renderer의 PDF당 시간은 레이아웃(render)과 출력(output)으로 나눠 표시합니다. 레이아웃 객체는
+# 문서마다 새로 만들므로 개선은 대부분 출력 단계(폰트 subset/폭 테이블)에서 나옵니다.
+#
+# 사용법: python -m benchmarks.bench_pdf [--font arialuni.ttf] [--items 20 200] [--count 20]
+
+import argparse
+import datetime
+import time
+
+from fpdf import FPDF
+
+from pdf_renderer import PdfRenderer
+
+CUSTOMER_INFO = {
+    '고객사명': '벤치마크고객', '건명': 'IVR 구축', '담당자명': '홍길동', '직위': '과장',
+    '이메일': 'hong@example.com', '전화번호': '010-0000-0000', '견적일자': '2024-01-01',
+    '납품기간': '발주 후 30일', '하자기간': '구축 후 1년'
+}
+COMPANY_INFO = {
+    '견적담당자명': '김철수', '견적담당자직위': '대리', '견적담당자이메일': 'kim@example.com',
+    '견적담당자전화번호': '02-0000-0000', '특이사항': '설치비 포함\n교육 1회 포함'
+}
+
+
+def make_items(count):
+    """합성 견적 항목"""
+    return [{'항목코드': f"IT-{i:05d}", '품목명': f"IPX-IVR 서버 구성품 {i}", '단위': 'EA',
+             '수량': 1 + i % 5, '단가': 100_000 * (1 + i % 7), '금액': (1 + i % 5) * 100_000 * (1 + i % 7)}
+            for i in range(count)]
+
+
+def legacy_generate_pdf(font_file, customer_info, company_info, selected_items, total):
+    """변경 전 EstimateHandler.generate_pdf (파일 대신 문자열로 출력)"""
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.add_font("ArialUnicode", '', font_file, uni=True)
+    pdf.set_font("ArialUnicode", size=12)
+    pdf.cell(200, 10, txt="견적서", ln=True, align="C")
+    pdf.ln(10)
+    pdf.set_font("ArialUnicode", size=10)
+    pdf.cell(200, 10, txt=f"고객사: {customer_info['고객사명']} | 건명: {customer_info['건명']}", ln=True)
+    pdf.cell(200, 10, txt=f"담당자: {customer_info['담당자명']} ({customer_info['직위']}) / {customer_info['전화번호']} / {customer_info['이메일']}", ln=True)
+    pdf.cell(200, 10, txt=f"견적일자: {datetime.date.today()} | 납품기간: {customer_info['납품기간']} | 하자기간: {customer_info['하자기간']}", ln=True)
+    pdf.cell(200, 10, txt=f"견적담당자: {company_info['견적담당자명']} ({company_info['견적담당자직위']}) / {company_info['견적담당자전화번호']} / {company_info['견적담당자이메일']}", ln=True)
+    pdf.ln(10)
+    pdf.set_font("ArialUnicode", style='', size=10)
+    for width, title in ((10, "No"), (30, "항목코드"), (60, "품목명"), (20, "단위"), (20, "수량"), (30, "단가"), (30, "금액")):
+        pdf.cell(width, 8, txt=title, border=1, align='C')
+    pdf.ln()
+    for idx, item in enumerate(selected_items, 1):
+        pdf.cell(10, 8, txt=str(idx), border=1, align='C')
+        pdf.cell(30, 8, txt=item['항목코드'], border=1, align='C')
+        pdf.cell(60, 8, txt=item['품목명'], border=1, align='L')
+        pdf.cell(20, 8, txt=item['단위'], border=1, align='C')
+        pdf.cell(20, 8, txt=str(item['수량']), border=1, align='R')
+        pdf.cell(30, 8, txt=f"{item['단가']:,}", border=1, align='R')
+        pdf.cell(30, 8, txt=f"{item['수량'] * item['단가']:,}", border=1, align='R')
+        pdf.ln()
+    pdf.ln(10)
+    pdf.set_font("ArialUnicode", size=11)
+    pdf.cell(200, 10, txt=f"총 금액 (VAT 별도): {total:,.0f}₩", ln=True, align='R')
+    pdf.ln(10)
+    pdf.set_font("ArialUnicode", size=10)
+    pdf.cell(200, 10, txt="특이사항:", ln=True)
+    pdf.ln(5)
+    pdf.cell(200, 8, txt=f"1. 납품기간: {customer_info['납품기간']}", ln=True)
+    pdf.cell(200, 8, txt=f"2. 하자보증: {customer_info['하자기간']}", ln=True)
+    pdf.cell(200, 8, txt="3. 부가세는 별도입니다.", ln=True)
+    if company_info.get('특이사항'):
+        for idx, line in enumerate(company_info['특이사항'].split('\n'), 4):
+            if line.strip():
+                pdf.cell(200, 8, txt=f"{idx}. {line.strip()}", ln=True)
+    return pdf.output(dest='S').encode('latin-1')
+
+
+def elapsed_ms(func, count):
+    """count회 실행 시 1회 평균 시간 (ms)"""
+    started = time.perf_counter()
+    for _ in range(count):
+        func()
+    return (time.perf_counter() - started) / count * 1000
+
+
+def measure(func, count):
+    """count회 생성 시 초당 PDF 수와 마지막 출력 크기"""
+    started = time.perf_counter()
+    for _ in range(count):
+        output = func()
+    elapsed = time.perf_counter() - started
+    return count / elapsed, len(output)
+
+
+def run(font_file, item_counts, count):
+    renderer = PdfRenderer(font_file)
+    results = []
+    for item_count in item_counts:
+        items = make_items(item_count)
+        total = sum(item['금액'] for item in items)
+        legacy_rate, legacy_size = measure(
+            lambda: legacy_generate_pdf(font_file, CUSTOMER_INFO, COMPANY_INFO, items, total), count)
+        renderer_rate, renderer_size = measure(
+            lambda: renderer.render(CUSTOMER_INFO, COMPANY_INFO, items, total).output(dest='S').encode('latin-1'),
+            count)
+        layout_ms = elapsed_ms(lambda: renderer.render(CUSTOMER_INFO, COMPANY_INFO, items, total), count)
+        results.append({'items': item_count, 'legacy_pdfs_per_sec': legacy_rate, 'legacy_bytes': legacy_size,
+                        'renderer_pdfs_per_sec': renderer_rate, 'renderer_bytes': renderer_size,
+                        'layout_ms': layout_ms, 'output_ms': max(0.0, 1000 / renderer_rate - layout_ms)})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="견적서 PDF 생성 벤치마크")
+    parser.add_argument("--font", default="arialuni.ttf", help="유니코드 TTF 폰트 파일")
+    parser.add_argument("--items", type=int, nargs='+', default=[20, 200])
+    parser.add_argument("--count", type=int, default=20, help="측정할 PDF 생성 횟수")
+    args = parser.parse_args()
+
+    print(f"{'항목 수':>8} {'기존 PDF/s':>12} {'기존 크기':>12} {'renderer PDF/s':>16} {'renderer 크기':>14} "
+          f"{'레이아웃(ms)':>12} {'출력(ms)':>10}")
+    for r in run(args.font, args.items, args.count):
+        print(f"{r['items']:>8} {r['legacy_pdfs_per_sec']:>12.1f} {r['legacy_bytes']:>12,} "
+              f"{r['renderer_pdfs_per_sec']:>16.1f} {r['renderer_bytes']:>14,} "
+              f"{r['layout_ms']:>12.2f} {r['output_ms']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# 불러온 견적서 수량으로 위젯 기본값을 채우는 비용 벤치마크 (render_item_selection의 rerun당 작업)
+#
+# 사용법: python -m benchmarks.bench_prefill [--sizes 10000 100000] [--loaded 50 500]
+
+import argparse
+
+from benchmarks.bench_pricing import best_of, make_catalog_df
+from catalog import Catalog
+
+
+def legacy_prefill(catalog, loaded_items):
+    """변경 전: 카탈로그 행마다 loaded_items 전체를 다시 탐색"""
+    defaults = []
+    for sub_df in catalog.by_category.values():
+        for code in sub_df['항목코드']:
+            default_qty = 0
+            for item in loaded_items:
+                if item['항목코드'] == code:
+                    default_qty = item['수량']
+            defaults.append(default_qty)
+    return defaults
+
+
+def indexed_prefill(catalog, loaded_quantities):
+    """변경 후: 불러올 때 만든 항목코드 → 수량 dict 조회"""
+    defaults = []
+    for sub_df in catalog.by_category.values():
+        for code in sub_df['항목코드']:
+            defaults.append(loaded_quantities.get(code, 0))
+    return defaults
+
+
+def run(sizes, loaded_counts, repeat):
+    results = []
+    for size in sizes:
+        catalog = Catalog(Catalog.normalize(make_catalog_df(size)), None)
+        for loaded in loaded_counts:
+            step = max(1, size // loaded)
+            loaded_items = [{'항목코드': code, '수량': 1 + i % 9}
+                            for i, code in enumerate(catalog.df['항목코드'][::step][:loaded])]
+            legacy_time, legacy_result = best_of(lambda: legacy_prefill(catalog, loaded_items), repeat)
+            # 인덱스 생성 비용(불러오기 시 1회)까지 포함
+            indexed_time, indexed_result = best_of(
+                lambda: indexed_prefill(catalog, {item['항목코드']: item['수량'] for item in loaded_items}),
+                repeat)
+            assert legacy_result == indexed_result, "기본값이 기존 방식과 다릅니다"
+            results.append({'size': size, 'loaded': loaded, 'legacy_sec': legacy_time,
+                            'indexed_sec': indexed_time, 'speedup': legacy_time / indexed_time})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="불러온 수량 기본값 채우기 벤치마크")
+    parser.add_argument("--sizes", type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument("--loaded", type=int, nargs='+', default=[50, 500])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'항목 수':>10} {'불러온 항목':>10} {'기존(s)':>10} {'인덱스(s)':>10} {'배율':>8}")
+    for r in run(args.sizes, args.loaded, args.repeat):
+        print(f"{r['size']:>10,} {r['loaded']:>10} {r['legacy_sec']:>10.4f} "
+              f"{r['indexed_sec']:>10.4f} {r['speedup']:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
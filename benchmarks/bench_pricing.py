@@ -0,0 +1,108 @@
+# 견적 금액 계산 벤치마크: 기존 iterrows 방식 vs pricing.price_quote
+#
+# 사용법: python -m benchmarks.bench_pricing [--sizes 10000 100000] [--repeat 3]
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from catalog import Catalog
+from pricing import price_quote, quantities_from_widgets
+
+CATEGORIES = ['H/W', 'S/W', 'SVC', 'LICENSE', 'ETC', 'NET', 'CTI', 'REC', 'AI', 'MNT']
+
+
+def make_catalog_df(size, seed=0):
+    """기초_견적항목_테이블.csv와 같은 형식(문자열 단가)의 합성 카탈로그"""
+    rng = np.random.default_rng(seed)
+    prices = rng.integers(1, 500, size) * 10_000
+    return pd.DataFrame({
+        '항목코드': [f"IT-{i:06d}" for i in range(size)],
+        '품목명': [f"품목 {i}" for i in range(size)],
+        '분류': rng.choice(CATEGORIES, size),
+        '단위': 'EA',
+        ' 기본단가 ': [f"{price:,}" for price in prices],
+        ' 제3단가 ': [f"{price * 9 // 10:,}" for price in prices],
+        '설명': '',
+    })
+
+
+def make_selection(catalog, ratio=0.01, seed=1):
+    """위젯 키 → 수량 dict (ratio 비율의 항목 선택)"""
+    rng = np.random.default_rng(seed)
+    picked = rng.random(len(catalog.widget_keys)) < ratio
+    return {key: int(qty) for key, qty, pick in
+            zip(catalog.widget_keys, rng.integers(1, 10, len(picked)), picked) if pick}
+
+
+def legacy_process_selected_items(df, selected_quantities):
+    """변경 전 EstimateHandler.process_selected_items (비교 기준)"""
+    selected_items = []
+    df.columns = df.columns.str.strip()
+    for cat in df['분류'].unique():
+        sub_df = df[df['분류'] == cat].reset_index(drop=True)
+        for i, row in sub_df.iterrows():
+            qty = selected_quantities.get(f"qty_{cat}_{i}", 0)
+            if qty > 0:
+                unit_price = int(str(row['기본단가']).replace(',', '').strip())
+                selected_items.append({
+                    "항목코드": row['항목코드'],
+                    "품목명": row['품목명'],
+                    "단위": row['단위'],
+                    "수량": qty,
+                    "단가": unit_price,
+                    "금액": qty * unit_price
+                })
+    total = sum([item['수량'] * item['단가'] for item in selected_items])
+    return selected_items, total
+
+
+def vectorized(catalog, selected_quantities):
+    """pricing 엔진 (카탈로그는 캐시에 있으므로 정규화 비용 제외)"""
+    return price_quote(catalog, quantities_from_widgets(catalog, selected_quantities))
+
+
+def best_of(func, repeat):
+    """repeat회 중 최소 실행 시간 (초)과 결과"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def run(sizes, repeat):
+    results = []
+    for size in sizes:
+        raw_df = make_catalog_df(size)
+        catalog = Catalog(Catalog.normalize(raw_df), None)
+        selection = make_selection(catalog)
+
+        legacy_time, legacy_result = best_of(
+            lambda: legacy_process_selected_items(raw_df.copy(), selection), repeat)
+        engine_time, engine_result = best_of(lambda: vectorized(catalog, selection), repeat)
+        assert legacy_result == engine_result, "계산 결과가 기존 방식과 다릅니다"
+
+        results.append({'size': size, 'selected': len(selection),
+                        'legacy_sec': legacy_time, 'vectorized_sec': engine_time,
+                        'speedup': legacy_time / engine_time})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="견적 금액 계산 벤치마크")
+    parser.add_argument("--sizes", type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'항목 수':>10} {'선택':>6} {'기존(s)':>10} {'벡터화(s)':>10} {'배율':>8}")
+    for r in run(args.sizes, args.repeat):
+        print(f"{r['size']:>10,} {r['selected']:>6} {r['legacy_sec']:>10.4f} "
+              f"{r['vectorized_sec']:>10.4f} {r['speedup']:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
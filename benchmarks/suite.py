@@ -0,0 +1,334 @@
+# 합성 대용량 quotation.db 기반 전체 벤치마크
+#
+# 사용법: python -m benchmarks.suite [--sizes 10000 100000 1000000] [--output results.json]
+#                                   [--baseline previous.json] [--threshold 0.2] [--font arialuni.ttf]
+#
+# 합성 DB는 --data-dir에 크기/시드/스키마 버전별로 한 번만 만들고, 측정은 매번 복사본에서 실행합니다.
+# --baseline을 주면 같은 측정 항목의 p50이 threshold(비율) 이상 느려졌을 때 종료 코드 1로 끝납니다.
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import tempfile
+import time
+
+from catalog import load_catalog
+from database import Database
+from estimate_handler import EstimateHandler
+from estimate_template import EstimateTemplate
+from migrations import LATEST_VERSION
+from pdf_renderer import PdfRenderer
+
+# 합성 데이터 생성 규칙이 바뀌면 올려서 캐시된 DB를 다시 만들도록 함
+GENERATOR_VERSION = 1
+CATALOG_FILE = "기초_견적항목_테이블.csv"
+
+# 버전 체인 길이 분포 (v1만 있는 견적이 가장 많음)
+CHAIN_LENGTHS = [1, 2, 3, 4, 5]
+CHAIN_WEIGHTS = [45, 25, 15, 10, 5]
+FINAL_RATIO = 0.3
+ITEMS_PER_ESTIMATE = (3, 15)
+CUSTOMERS = 2000
+
+COMPANY_INFO = {
+    '견적담당자명': '김철수', '견적담당자직위': '대리', '견적담당자이메일': 'kim@example.com',
+    '견적담당자전화번호': '02-0000-0000', '특이사항': '설치비 포함'
+}
+
+
+class SyntheticData:
+    """시드로 재현 가능한 합성 견적 데이터"""
+    def __init__(self, catalog, seed=0):
+        self.catalog = catalog
+        self.rng = random.Random(seed)
+        self.rows = list(catalog.by_code.values())
+
+    def customer_info(self):
+        rng = self.rng
+        customer = rng.randrange(CUSTOMERS)
+        estimate_date = datetime.date(2022, 1, 1) + datetime.timedelta(days=rng.randrange(1000))
+        return {
+            '고객사명': f"고객사{customer:04d}", '건명': f"콜센터 구축 {rng.randrange(100)}",
+            '담당자명': f"담당{customer % 97}", '직위': '과장', '이메일': f"c{customer}@example.com",
+            '전화번호': f"010-{customer:04d}-0000", '견적일자': estimate_date.isoformat(),
+            '납품기간': '발주 후 30일', '하자기간': '구축 후 1년'
+        }
+
+    def items(self):
+        count = self.rng.randint(*ITEMS_PER_ESTIMATE)
+        items = []
+        for row in self.rng.sample(self.rows, min(count, len(self.rows))):
+            quantity = self.rng.randint(1, 10)
+            items.append({'항목코드': row['항목코드'], '품목명': row['품목명'], '단위': row['단위'],
+                          '수량': quantity, '단가': int(row['기본단가']),
+                          '금액': quantity * int(row['기본단가'])})
+        return items
+
+    def record(self, customer_info, version, parent_id=None, is_final=False):
+        items = self.items()
+        return {'customer_info': customer_info, 'company_info': COMPANY_INFO, 'items': items,
+                'total_amount': sum(item['금액'] for item in items),
+                'filename': f"{customer_info['고객사명']}_{customer_info['건명']}_{version}",
+                'parent_id': parent_id, 'is_final': is_final}
+
+
+def generate_db(path, estimates, catalog, seed=0, progress=print):
+    """estimates건 규모의 합성 DB 생성 (체인 단위로 v1 → v2 ... → final 순서로 저장)"""
+    data = SyntheticData(catalog, seed)
+    chains = []  # (고객 정보, 체인 길이, final 여부)
+    total = 0
+    while total < estimates:
+        length = min(data.rng.choices(CHAIN_LENGTHS, CHAIN_WEIGHTS)[0], estimates - total)
+        chains.append((data.customer_info(), length, data.rng.random() < FINAL_RATIO))
+        total += length
+
+    db = Database(path)
+    parents = [None] * len(chains)
+    started = time.perf_counter()
+    # n번째 wave는 각 체인의 n번째 버전 (직전 wave에서 저장된 ID를 부모로 사용)
+    for wave in range(max(CHAIN_LENGTHS)):
+        members = [i for i, (_, length, _) in enumerate(chains) if length > wave]
+        if not members:
+            break
+        records = (
+            data.record(chains[i][0],
+                        "final" if chains[i][2] and wave == chains[i][1] - 1 else f"v{wave + 1}",
+                        parents[i], chains[i][2] and wave == chains[i][1] - 1)
+            for i in members
+        )
+        result = db.save_estimates_bulk(records, batch_size=5000)
+        if result['failures']:
+            raise RuntimeError(f"합성 데이터 저장 실패: {result['failures'][:3]}")
+        for i, estimate_id in zip(members, result['ids']):
+            parents[i] = estimate_id
+        progress(f"  wave {wave + 1}: {len(members):,}건 ({time.perf_counter() - started:.1f}초)")
+    db.close()
+    return path
+
+
+def cached_db(data_dir, estimates, catalog, seed=0):
+    """캐시된 합성 DB 경로 (없으면 생성)"""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"synthetic_{estimates}_s{seed}_g{GENERATOR_VERSION}_m{LATEST_VERSION}.db")
+    if not os.path.exists(path):
+        print(f"합성 DB 생성: {estimates:,}건 → {path}")
+        tmp_path = path + ".tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        generate_db(tmp_path, estimates, catalog, seed)
+        # WAL 내용을 본 파일에 반영한 뒤 완성된 파일만 캐시로 사용
+        conn = sqlite3.connect(tmp_path)
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.execute("PRAGMA journal_mode=DELETE")
+        conn.close()
+        os.replace(tmp_path, path)
+    return path
+
+
+def timed(func, args_list):
+    """args_list의 인자로 func를 한 번씩 호출한 소요 시간 통계(ms) (첫 인자로 한 번 워밍업)"""
+    if args_list:
+        func(*args_list[0])
+    timings = []
+    for args in args_list:
+        started = time.perf_counter()
+        func(*args)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        'n': len(timings),
+        'mean_ms': sum(timings) / len(timings),
+        'p50_ms': timings[len(timings) // 2],
+        'p95_ms': timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+        'max_ms': timings[-1],
+    }
+
+
+def sample_ids(db, count, rng, condition="1 = 1"):
+    """조건에 맞는 견적서 ID 무작위 추출"""
+    conn = db.get_connection()
+    low, high = conn.execute(f"SELECT MIN(estimate_id), MAX(estimate_id) FROM estimates WHERE {condition}").fetchone()
+    ids = []
+    attempts = 0
+    while len(ids) < count and attempts < count * 50:
+        attempts += 1
+        row = conn.execute(f"SELECT estimate_id FROM estimates WHERE estimate_id >= ? AND {condition} "
+                           f"ORDER BY estimate_id LIMIT 1", (rng.randint(low, high),)).fetchone()
+        if row:
+            ids.append(row[0])
+    return ids
+
+
+def bench_database(path, catalog, repeat, seed):
+    """DB 관련 측정 (쓰기 측정은 읽기 측정 뒤에 실행)"""
+    rng = random.Random(seed)
+    data = SyntheticData(catalog, seed + 1)
+    db = Database(path)
+    results = {}
+
+    ids = sample_ids(db, repeat, rng)
+    results['load_estimate'] = timed(db.load_estimate, [(i,) for i in ids])
+    results['load_estimates.500'] = timed(
+        lambda batch: list(db.load_estimates(batch)),
+        [(sample_ids(db, 500, rng),) for _ in range(max(1, repeat // 50))])
+    results['get_estimate_version'] = timed(db.get_estimate_version, [(i,) for i in ids])
+    results['get_estimate_history.first_page'] = timed(
+        lambda: db.get_estimate_history(limit=50), [()] * repeat)
+    results['get_estimate_history.latest_only'] = timed(
+        lambda: db.get_estimate_history(limit=50, latest_only=True), [()] * repeat)
+    results['get_estimate_history.customer'] = timed(
+        lambda customer: db.get_estimate_history(limit=50, customer=customer),
+        [(f"고객사{rng.randrange(CUSTOMERS):04d}",) for _ in range(repeat)])
+
+    codes = [row['항목코드'] for row in data.rows]
+    results['search_estimates.customer'] = timed(
+        lambda query: db.search_estimates(query, limit=50),
+        [(f"고객사{rng.randrange(CUSTOMERS):04d}",) for _ in range(repeat)])
+    results['search_estimates.customer_item'] = timed(
+        lambda query: db.search_estimates(query, limit=50),
+        [(f"고객사{rng.randrange(CUSTOMERS):04d} {rng.choice(codes)}",) for _ in range(repeat)])
+
+    def deep_page(pages):
+        cursor = None
+        for _ in range(pages):
+            history = db.get_estimate_history(limit=50, after_cursor=cursor)
+            if not history:
+                break
+            cursor = Database.history_cursor(history[-1])
+    results['get_estimate_history.page_20'] = timed(deep_page, [(20,)] * max(1, repeat // 10))
+
+    def save(parent_id, is_final):
+        record = data.record(data.customer_info(), "bench", parent_id, is_final)
+        db.save_estimate(record['customer_info'], record['company_info'], record['items'],
+                         record['total_amount'], record['filename'], parent_id, is_final)
+    results['save_estimate.new'] = timed(save, [(None, False)] * repeat)
+    parents = sample_ids(db, repeat, rng, "is_final = 0")
+    results['save_estimate.child_version'] = timed(save, [(i, False) for i in parents])
+    finals = sample_ids(db, repeat, rng, "is_final = 1")
+    results['save_estimate.final_update'] = timed(save, [(i, True) for i in finals])
+
+    db.close()
+    return results
+
+
+def bench_rendering(catalog, repeat, font_file, seed):
+    """DB 크기와 무관한 견적 계산/문서 생성 측정"""
+    rng = random.Random(seed)
+    data = SyntheticData(catalog, seed)
+    handler = EstimateHandler(doc_folder=tempfile.mkdtemp(prefix="bench_docs_"),
+                              pdf_renderer=PdfRenderer(font_file) if font_file else None)
+    results = {}
+
+    widget_quantities = [
+        {key: rng.randint(0, 3) for key in catalog.widget_keys} for _ in range(repeat)
+    ]
+    results['process_selected_items'] = timed(
+        handler.process_selected_items, [(catalog, quantities) for quantities in widget_quantities])
+
+    documents = []
+    for _ in range(repeat):
+        items = data.items()
+        documents.append((data.customer_info(), COMPANY_INFO, items, sum(item['금액'] for item in items)))
+    results['generate_html'] = timed(EstimateTemplate.generate_html, documents)
+    if font_file:
+        results['generate_pdf'] = timed(
+            handler.generate_pdf, [("bench", *document) for document in documents])
+    shutil.rmtree(handler.doc_folder, ignore_errors=True)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """기준 결과 대비 p50이 threshold 이상 느려진 측정 항목 목록"""
+    regressions = []
+    for scope, operations in results['results'].items():
+        for name, stats in operations.items():
+            previous = baseline.get('results', {}).get(scope, {}).get(name)
+            if not previous or not previous['p50_ms']:
+                continue
+            ratio = stats['p50_ms'] / previous['p50_ms'] - 1
+            marker = "  ← 회귀" if ratio > threshold else ""
+            print(f"  {scope:<10} {name:<36} {previous['p50_ms']:>9.3f} → {stats['p50_ms']:>9.3f} ms "
+                  f"({ratio:+.0%}){marker}")
+            if ratio > threshold:
+                regressions.append((scope, name, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="합성 대용량 DB 기반 견적 시스템 벤치마크")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000], help="합성 DB 견적서 수")
+    parser.add_argument("--repeat", type=int, default=200, help="측정 항목별 반복 횟수")
+    parser.add_argument("--seed", type=int, default=0, help="합성 데이터 시드")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "quotation_bench"),
+                        help="합성 DB 캐시 폴더")
+    parser.add_argument("--font", default=None, help="PDF 폰트(TTF) 파일 (지정 시 generate_pdf 측정)")
+    parser.add_argument("--output", default=None, help="결과 JSON 파일")
+    parser.add_argument("--baseline", default=None, help="비교할 이전 결과 JSON 파일")
+    parser.add_argument("--threshold", type=float, default=0.2, help="회귀로 판단할 p50 증가 비율")
+    args = parser.parse_args()
+
+    catalog = load_catalog(CATALOG_FILE)
+    results = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+            'seed': args.seed,
+            'generator_version': GENERATOR_VERSION,
+            'schema_version': LATEST_VERSION,
+        },
+        'results': {},
+    }
+
+    results['results']['render'] = bench_rendering(catalog, args.repeat, args.font, args.seed)
+    for size in args.sizes:
+        source = cached_db(args.data_dir, size, catalog, args.seed)
+        work_path = os.path.join(args.data_dir, f"work_{size}.db")
+        shutil.copyfile(source, work_path)
+        try:
+            print(f"측정: {size:,}건")
+            results['results'][str(size)] = bench_database(work_path, catalog, args.repeat, args.seed)
+        finally:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(work_path + suffix):
+                    os.remove(work_path + suffix)
+
+    for scope, operations in results['results'].items():
+        print(f"[{scope}]")
+        for name, stats in operations.items():
+            print(f"  {name:<36} 평균 {stats['mean_ms']:>9.3f}  p50 {stats['p50_ms']:>9.3f}  "
+                  f"p95 {stats['p95_ms']:>9.3f} ms")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"기준 결과({baseline['meta'].get('commit')}) 대비:")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"성능 회귀 {len(regressions)}건 (기준 {args.threshold:.0%} 초과)")
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
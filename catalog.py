@@ -0,0 +1,124 @@
+import hashlib
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+PRICE_COLUMNS = ['기본단가', '제3단가']
+
+
+def _file_digest(path):
+    """파일 내용 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Catalog:
+    """정규화된 기초 견적 항목 테이블
+
+    df는 컬럼명 공백이 제거되고 단가 컬럼이 정수로 변환된 상태이며, 여러 세션이 공유하므로 수정하지 않습니다.
+    """
+    def __init__(self, df, digest):
+        self.df = df
+        self.digest = digest
+        # 항목코드 → 행 dict
+        self.by_code = {row['항목코드']: row for row in df.to_dict(orient='records')}
+        # 견적 항목 생성에 쓰는 컬럼의 numpy 배열 (견적마다 DataFrame 인덱싱을 하지 않도록 미리 변환)
+        self.arrays = {
+            column: df[column].to_numpy()
+            for column in ['항목코드', '품목명', '단위', *PRICE_COLUMNS] if column in df.columns
+        }
+        # 항목코드 → 행 위치 (주문/API 등 항목코드로 수량을 받는 경우)
+        self.position_by_code = {code: i for i, code in enumerate(df['항목코드'].tolist())}
+        # 분류 → 해당 분류 항목 DataFrame (파일 등장 순서 유지, 인덱스 0부터)
+        self.by_category = {
+            cat: sub_df.reset_index(drop=True)
+            for cat, sub_df in df.groupby('분류', sort=False)
+        }
+        # 각 행의 수량 입력 위젯 키 (qty_{분류}_{분류 내 순번})
+        positions = df.groupby('분류', sort=False).cumcount()
+        self.widget_keys = [f"qty_{cat}_{i}" for cat, i in zip(df['분류'], positions)]
+        # 화면 표시 순서 (분류 등장 순서 → 분류 내 순서)의 행 위치
+        self.display_order = np.concatenate(
+            [indices for indices in df.groupby('분류', sort=False).indices.values()]
+        ) if len(df) else np.array([], dtype=np.int64)
+
+    @staticmethod
+    def normalize(df):
+        """컬럼명 공백 제거 및 단가 컬럼 정수 변환 (숫자가 아닌 단가가 있으면 ValueError)"""
+        df = df.copy()
+        df.columns = df.columns.str.strip().str.lstrip('\ufeff')
+        for column in PRICE_COLUMNS:
+            if column in df.columns:
+                prices = pd.to_numeric(
+                    df[column].astype(str).str.replace(',', '', regex=False).str.strip(),
+                    errors='coerce'
+                )
+                # 잘못된 단가를 0원으로 바꾸면 무료 견적이 나가므로 항목코드와 함께 오류로 알림
+                invalid = prices.isna()
+                if invalid.any():
+                    codes = df.loc[invalid, '항목코드'].astype(str).tolist()
+                    raise ValueError(f"{column}를 숫자로 변환할 수 없는 항목코드: {', '.join(codes)}")
+                df[column] = prices.astype('int64')
+        return df
+
+
+class CatalogCache:
+    """파일 변경 시에만 다시 읽는 프로세스 단위 카탈로그 캐시
+
+    수정 시각/크기가 그대로면 파일을 읽지 않고, 바뀌었으면 내용 해시를 비교해
+    실제로 내용이 달라졌을 때만 다시 파싱합니다.
+    """
+    def __init__(self):
+        self._entries = {}  # 절대 경로 → (mtime_ns, size, Catalog)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path):
+        """카탈로그 조회 (필요한 경우에만 로드)"""
+        key = os.path.abspath(path)
+        stat = os.stat(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[:2] == (stat.st_mtime_ns, stat.st_size):
+                self.hits += 1
+                return entry[2]
+
+            digest = _file_digest(key)
+            if entry and entry[2].digest == digest:
+                # 내용은 같고 수정 시각만 바뀐 경우
+                self._entries[key] = (stat.st_mtime_ns, stat.st_size, entry[2])
+                self.hits += 1
+                return entry[2]
+
+            catalog = Catalog(Catalog.normalize(pd.read_csv(key)), digest)
+            self._entries[key] = (stat.st_mtime_ns, stat.st_size, catalog)
+            self.misses += 1
+            return catalog
+
+    def stats(self):
+        """캐시 적중/미적중 횟수"""
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+    def clear(self):
+        """캐시 비우기"""
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = CatalogCache()
+
+
+def load_catalog(path):
+    """프로세스 공유 캐시에서 카탈로그 조회"""
+    return _cache.get(path)
+
+
+def catalog_cache_stats():
+    """프로세스 공유 카탈로그 캐시 통계"""
+    return _cache.stats()
@@ -0,0 +1,49 @@
+import hashlib
+import json
+
+# 견적서마다 반복되는 연락처 필드 (customers / sales_reps 테이블에 내용별로 한 번만 저장)
+# 건명/견적일자/납품기간/하자기간/특이사항처럼 견적서마다 다른 필드는 estimates에 그대로 저장합니다.
+CUSTOMER_CONTACT_FIELDS = ('고객사명', '담당자명', '직위', '이메일', '전화번호')
+SALES_REP_FIELDS = ('견적담당자명', '견적담당자직위', '견적담당자이메일', '견적담당자전화번호')
+
+# 연락처 테이블 → ID 컬럼
+CONTACT_ID_COLUMNS = {'customers': 'customer_id', 'sales_reps': 'sales_rep_id'}
+
+
+def split_contact(info, fields):
+    """정보 dict를 (연락처 필드 dict, 나머지 필드 dict)로 분리"""
+    contact = {}
+    rest = {}
+    for key, value in info.items():
+        if key in fields:
+            contact[key] = value
+        else:
+            rest[key] = value
+    return contact, rest
+
+
+def content_hash(contact):
+    """연락처 내용 해시 (키 순서와 무관)"""
+    canonical = json.dumps(contact, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def contact_id(cursor, table, contact, cache=None):
+    """연락처 행 ID 조회 (같은 내용이 없으면 추가하므로 쓰기 트랜잭션 안에서 호출)
+
+    cache는 같은 트랜잭션 안에서만 재사용해야 합니다 (롤백되면 추가한 행도 사라지므로).
+    """
+    key = content_hash(contact)
+    if cache is not None and (table, key) in cache:
+        return cache[(table, key)]
+    id_column = CONTACT_ID_COLUMNS[table]
+    cursor.execute(f"SELECT {id_column} FROM {table} WHERE content_hash = ?", (key,))
+    row = cursor.fetchone()
+    if row:
+        row_id = row[0]
+    else:
+        cursor.execute(f"INSERT INTO {table} (content_hash, info) VALUES (?, ?)", (key, json.dumps(contact)))
+        row_id = cursor.lastrowid
+    if cache is not None:
+        cache[(table, key)] = row_id
+    return row_id
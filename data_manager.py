@@ -1,47 +1,119 @@
 import pandas as pd
 import os
-from datetime import datetime
+from datetime import date, datetime
 from database import Database
+from catalog import load_catalog
+from metrics import timed
+
+# 견적서 메타 정보 중 고객 정보(customer_info) / 당사 정보(company_info) 필드
+CUSTOMER_FIELDS = ['고객사명', '건명', '담당자명', '직위', '이메일', '전화번호', '견적일자', '납품기간', '하자기간']
+COMPANY_FIELDS = ['견적담당자명', '견적담당자직위', '견적담당자이메일', '견적담당자전화번호', '특이사항']
 
 class DataManager:
-    def __init__(self, base_csv_file="기초_견적항목_테이블.csv", doc_folder="견적서_이력"):
+    def __init__(self, base_csv_file="기초_견적항목_테이블.csv", doc_folder="견적서_이력", db=None):
         self.base_csv_file = base_csv_file
         self.doc_folder = doc_folder
-        os.makedirs(doc_folder, exist_ok=True)
-        self.db = Database()
+        # 견적서 폴더는 파일을 저장할 때 생성 (읽기 전용 환경에서도 동작하도록)
+        self.db = db or Database()
         
+    @timed("data_manager.load_base_items", rows=len)
     def load_base_items(self):
-        """기초 견적 항목 데이터 로드"""
-        return pd.read_csv(self.base_csv_file)
+        """기초 견적 항목 데이터 로드 (파일이 바뀌었을 때만 다시 읽음, 반환값은 공유되므로 수정 금지)"""
+        return self.load_catalog().df
+        
+    @timed("data_manager.load_catalog", rows=lambda catalog: len(catalog.df))
+    def load_catalog(self):
+        """기초 견적 항목 카탈로그 조회 (항목코드/분류별 조회 포함)"""
+        return load_catalog(self.base_csv_file)
+        
+    @staticmethod
+    def build_estimate_record(meta_data, selected_items, filename, parent_id=None):
+        """화면 입력(meta_data) 형식을 Database.save_estimate 인자 형식으로 변환"""
+        estimate_date = meta_data['견적일자']
+        return {
+            'customer_info': {
+                '고객사명': meta_data['고객사명'],
+                '건명': meta_data['건명'],
+                '담당자명': meta_data['담당자명'],
+                '직위': meta_data['직위'],
+                '이메일': meta_data['이메일'],
+                '전화번호': meta_data['전화번호'],
+                '견적일자': estimate_date.strftime("%Y-%m-%d") if hasattr(estimate_date, 'strftime') else str(estimate_date),
+                '납품기간': meta_data['납품기간'],
+                '하자기간': meta_data['하자기간']
+            },
+            'company_info': {
+                '견적담당자명': meta_data['견적담당자명'],
+                '견적담당자직위': meta_data['견적담당자직위'],
+                '견적담당자이메일': meta_data['견적담당자이메일'],
+                '견적담당자전화번호': meta_data['견적담당자전화번호'],
+                '특이사항': meta_data.get('특이사항', '')
+            },
+            'items': selected_items,
+            'total_amount': meta_data['총금액'],
+            'filename': filename,
+            'parent_id': parent_id,
+            'is_final': meta_data.get('is_final', False)
+        }
+        
+    @staticmethod
+    def generate_filename(customer_info, version):
+        """견적서 파일명 생성: (YYYY-MM-DD)고객사명_건명4자_버전"""
+        # 견적일자 가져오기
+        estimate_date = customer_info['견적일자']
+        if isinstance(estimate_date, str):
+            try:
+                estimate_date = datetime.strptime(estimate_date, "%Y-%m-%d").date()
+            except ValueError:
+                estimate_date = date.today()
+        elif not isinstance(estimate_date, date):
+            estimate_date = date.today()
+            
+        # 날짜 형식 변환 (YYYY-MM-DD)
+        date_str = estimate_date.strftime("(%Y-%m-%d)")
+        
+        # 고객사명과 건명 가져오기 (특수문자 제거)
+        company_name = ''.join(e for e in customer_info['고객사명'] if e.isalnum() or e.isspace())
+        project_name = ''.join(e for e in customer_info['건명'] if e.isalnum() or e.isspace())
+        
+        # 공백 제거 및 기본값 설정
+        company_name = company_name.strip()
+        project_name = project_name.strip()
+        
+        if not company_name:
+            company_name = "NoCompany"
+        if not project_name:
+            project_name = "NoProject"
+            
+        # 건명은 앞 4자리만 사용
+        project_name = project_name[:4]
+            
+        # 파일명 구성: (YYYY-MM-DD)고객사명_건명4자_버전
+        return f"{date_str}{company_name}_{project_name}_{version}"
+        
+    @staticmethod
+    def document_items(items):
+        """load_estimate 항목의 수량/단가/금액(REAL 저장)을 문서 표시용 정수로 변환"""
+        def whole(value):
+            if isinstance(value, float) and value.is_integer():
+                return int(value)
+            return value
+        return [{**item, '수량': whole(item['수량']), '단가': whole(item['단가']), '금액': whole(item['금액'])}
+                for item in items]
+        
+    @staticmethod
+    def split_estimate_data(estimate_data):
+        """load_estimate의 estimate_data를 (customer_info, company_info)로 분리 (없는 필드는 '')"""
+        customer_info = {field: estimate_data.get(field) or '' for field in CUSTOMER_FIELDS}
+        company_info = {field: estimate_data.get(field) or '' for field in COMPANY_FIELDS}
+        return customer_info, company_info
         
     def save_estimate(self, meta_data, selected_items, filename, parent_id=None):
         """견적서 데이터 저장"""
         try:
             # 데이터베이스에 저장
             estimate_id = self.db.save_estimate(
-                customer_info={
-                    '고객사명': meta_data['고객사명'],
-                    '건명': meta_data['건명'],
-                    '담당자명': meta_data['담당자명'],
-                    '직위': meta_data['직위'],
-                    '이메일': meta_data['이메일'],
-                    '전화번호': meta_data['전화번호'],
-                    '견적일자': meta_data['견적일자'].strftime("%Y-%m-%d"),
-                    '납품기간': meta_data['납품기간'],
-                    '하자기간': meta_data['하자기간']
-                },
-                company_info={
-                    '견적담당자명': meta_data['견적담당자명'],
-                    '견적담당자직위': meta_data['견적담당자직위'],
-                    '견적담당자이메일': meta_data['견적담당자이메일'],
-                    '견적담당자전화번호': meta_data['견적담당자전화번호'],
-                    '특이사항': meta_data.get('특이사항', '')
-                },
-                items=selected_items,
-                total_amount=meta_data['총금액'],
-                filename=filename,
-                parent_id=parent_id,
-                is_final=meta_data.get('is_final', False)
+                **self.build_estimate_record(meta_data, selected_items, filename, parent_id)
             )
             
             if not estimate_id:
@@ -52,13 +124,43 @@ class DataManager:
         except Exception as e:
             raise Exception(f"견적서 저장 중 오류가 발생했습니다: {str(e)}")
         
+    def save_estimates_bulk(self, estimates, batch_size=500):
+        """견적서 대량 저장
+
+        estimates는 {'meta_data', 'selected_items', 'filename', 'parent_id'(선택)} dict의 iterable입니다.
+        batch_size 건마다 커밋하며, 실패한 레코드는 건너뛰고 failures에 기록합니다.
+        반환값: {'ids': 입력 순서대로의 estimate_id (실패 시 None), 'failures': [...]}
+        """
+        return self.db.save_estimates_bulk(
+            estimates,
+            batch_size=batch_size,
+            prepare=lambda record: self.build_estimate_record(
+                record['meta_data'],
+                record['selected_items'],
+                record['filename'],
+                record.get('parent_id')
+            )
+        )
+        
     def load_estimate(self, estimate_id):
         """견적서 불러오기"""
         return self.db.load_estimate(estimate_id)
         
-    def get_estimate_history(self):
-        """견적서 이력 조회"""
-        history = self.db.get_estimate_history()
+    def load_estimates(self, estimate_ids):
+        """여러 견적서를 (estimate_data, items)로 입력 순서대로 불러오는 제너레이터"""
+        return self.db.load_estimates(estimate_ids)
+        
+    def get_estimate_history(self, limit=None, after_cursor=None, customer=None,
+                             date_from=None, date_to=None, latest_only=False):
+        """견적서 이력 조회 (최신순, 키셋 페이지네이션)"""
+        history = self.db.get_estimate_history(
+            limit=limit,
+            after_cursor=after_cursor,
+            customer=customer,
+            date_from=date_from,
+            date_to=date_to,
+            latest_only=latest_only
+        )
         
         # 이력이 없는 경우 빈 리스트 반환
         if not history:
@@ -67,12 +169,20 @@ class DataManager:
         # 이미 올바른 형식으로 반환되므로 그대로 반환
         return history
         
+    def search_estimates(self, query, limit=50, latest_only=False):
+        """견적서 전문 검색 (고객사명/건명/담당자명/파일명/품목, 관련도순)
+
+        반환값: {'items': 검색 결과, 'truncated': 후보 제한으로 오래된 견적서가 순위에서 빠졌는지 여부}
+        """
+        return self.db.search_estimates(query, limit=limit, latest_only=latest_only)
+        
     def save_estimate_csv(self, meta_data, selected_items, filename):
         """견적서 데이터 CSV 저장"""
         meta_df = pd.DataFrame([meta_data])
         item_df = pd.DataFrame(selected_items)
         combined_df = pd.concat([meta_df, item_df], axis=1)
         
+        os.makedirs(self.doc_folder, exist_ok=True)
         save_path = os.path.join(self.doc_folder, f"{filename}.csv")
         combined_df.to_csv(save_path, index=False, encoding="utf-8-sig")
         return save_path
@@ -84,6 +194,8 @@ class DataManager:
         
     def get_saved_files(self):
         """저장된 견적서 파일 목록 조회"""
+        if not os.path.isdir(self.doc_folder):
+            return []
         return sorted([f for f in os.listdir(self.doc_folder) if f.endswith(".csv")])
         
     def get_estimate_version(self, estimate_id):
@@ -1,169 +1,392 @@
 import sqlite3
+import itertools
+import re
+import threading
 import uuid
 from datetime import datetime
 import os
 import json
+from contacts import CUSTOMER_CONTACT_FIELDS, SALES_REP_FIELDS, contact_id, split_contact
+from migrations import migrate
+from metrics import timed, timer
+from query_trace import SQL_TRACE_ENABLED, TracingConnection
+
+
+INSERT_ITEM_SQL = """
+    INSERT INTO estimate_items (
+        estimate_id, item_code, item_name, unit, 
+        quantity, unit_price, amount
+    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _item_rows(estimate_id, items):
+    """estimate_items INSERT용 파라미터 생성"""
+    for item in items:
+        yield (estimate_id, item['항목코드'], item['품목명'],
+               item['단위'], item['수량'], item['단가'], item['금액'])
+
+
+INSERT_ITEM_DELTA_SQL = """
+    INSERT INTO estimate_item_deltas (
+        estimate_id, item_code, position, item_name, unit,
+        quantity, unit_price, amount
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_SEARCH_SQL = """
+    INSERT INTO estimate_search (rowid, customer_name, subject, contacts, filename, items)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+# 전문 검색 컬럼 가중치 (customer_name, subject, contacts, filename, items 순, bm25 인자)
+SEARCH_WEIGHTS = (10.0, 5.0, 3.0, 2.0, 1.0)
+# 관련도 점수를 계산할 최대 후보 수 (일치하는 견적서가 더 많으면 최근 견적서부터 이만큼만)
+SEARCH_CANDIDATES = 2000
+
+# 견적서 헤더 조회 (연락처 테이블 포함, 뒤에 WHERE 절을 붙여 사용)
+ESTIMATE_HEADER_SQL = """
+    SELECT e.customer_info, e.company_info, e.total_amount, e.is_final, e.estimate_id,
+           e.delta_base_id, c.info, s.info
+    FROM estimates e
+    LEFT JOIN customers c ON c.customer_id = e.customer_id
+    LEFT JOIN sales_reps s ON s.sales_rep_id = e.sales_rep_id
+"""
+
+# 델타 저장 기본값 (DatabaseConfig로 DB별 지정 가능)
+DELTA_STORAGE_ENABLED = os.environ.get("QUOTE_DELTA_STORAGE", "0") == "1"
+DELTA_SNAPSHOT_INTERVAL = int(os.environ.get("QUOTE_DELTA_SNAPSHOT_INTERVAL", "10"))
+
+
+def _item_dict(row):
+    """estimate_items 조회 행(item_code, item_name, unit, quantity, unit_price, amount)을 항목 dict로 변환"""
+    return {
+        '항목코드': row[0],
+        '품목명': row[1],
+        '단위': row[2],
+        '수량': row[3],
+        '단가': row[4],
+        '금액': row[5]
+    }
+
+
+def _contact_info(info, cache=None):
+    """연락처 테이블 info JSON 파싱 (cache를 주면 같은 연락처는 한 번만 파싱)"""
+    if info is None:
+        return {}
+    if cache is None:
+        return json.loads(info)
+    parsed = cache.get(info)
+    if parsed is None:
+        parsed = cache[info] = json.loads(info)
+    return parsed
+
+
+def _estimate_data(header_row, customer_info, company_info, contact_cache=None):
+    """ESTIMATE_HEADER_SQL 행과 estimates에 저장된 고객/당사 정보를 저장 전과 같은 dict로 합침"""
+    return {
+        **_contact_info(header_row[6], contact_cache),
+        **customer_info,
+        **_contact_info(header_row[7], contact_cache),
+        **company_info,
+        '총금액': header_row[2],
+        'estimate_id': header_row[4],
+        'is_final': header_row[3]
+    }
+
+
+def _item_values(item):
+    """항목 비교용 값 (항목코드, 품목명, 단위, 수량, 단가, 금액)"""
+    return (item['항목코드'], item['품목명'], item['단위'], item['수량'], item['단가'], item['금액'])
+
+
+def _dict_delta(base, new):
+    """부모 대비 바뀐 필드만 담은 dict (필드가 빠진 경우는 표현할 수 없으므로 None)"""
+    if any(key not in new for key in base):
+        return None
+    return {key: value for key, value in new.items() if key not in base or base[key] != value}
+
+
+def _item_delta(base_items, items):
+    """부모 항목 대비 변경분 (item_code, position, 품목명, 단위, 수량, 단가, 금액) 목록
+
+    항목코드가 중복되거나 변경분으로 순서를 복원할 수 없으면 None을 반환합니다.
+    """
+    base_by_code = {item['항목코드']: _item_values(item) for item in base_items}
+    codes = [item['항목코드'] for item in items]
+    if len(base_by_code) != len(base_items) or len(set(codes)) != len(codes):
+        return None
+
+    new_codes = set(codes)
+    deltas = [(code, None, None, None, None, None, None) for code in base_by_code if code not in new_codes]
+    for position, item in enumerate(items):
+        values = _item_values(item)
+        if base_by_code.get(values[0]) != values:
+            deltas.append((values[0], position, *values[1:]))
+
+    if [_item_values(item) for item in _apply_item_delta(base_items, deltas)] != \
+            [_item_values(item) for item in items]:
+        return None
+    return deltas
+
+
+def _apply_item_delta(base_items, deltas):
+    """부모 항목 목록에 변경분 적용
+
+    변경/추가된 항목은 기록된 위치에 두고, 나머지 자리는 바뀌지 않은 부모 항목을 원래 순서대로 채웁니다.
+    """
+    placed = {}
+    changed = set()
+    for code, position, name, unit, quantity, unit_price, amount in deltas:
+        changed.add(code)
+        if position is not None:
+            placed[position] = _item_dict((code, name, unit, quantity, unit_price, amount))
+    unchanged = [item for item in base_items if item['항목코드'] not in changed]
+
+    rest = iter(unchanged)
+    items = []
+    for position in range(len(unchanged) + len(placed)):
+        item = placed.get(position)
+        items.append(item if item is not None else next(rest))
+    return items
+
+
+def _resolve_filename(filename, version):
+    """저장 파일명 (filename이 함수면 저장 트랜잭션에서 정해진 버전('v3', 'final')으로 생성)"""
+    return filename(version) if callable(filename) else filename
+
+
+def _bulk_failure(index, record, error):
+    """대량 저장 실패 레코드 정보"""
+    filename = record.get('filename') if isinstance(record, dict) else None
+    if callable(filename):
+        filename = None
+    return {'index': index, 'filename': filename, 'error': str(error)}
+
+
+def _header_columns(customer_info):
+    """검색/이력용으로 분리 저장하는 고객 정보 컬럼 값 (고객사명, 건명, 견적일자)"""
+    estimate_date = customer_info.get('견적일자')
+    return (
+        customer_info.get('고객사명'),
+        customer_info.get('건명'),
+        str(estimate_date) if estimate_date is not None else None
+    )
+
+
+def _search_row(estimate_id, customer_info, company_info, filename, items):
+    """estimate_search INSERT용 파라미터 (고객사명, 건명, 담당자명, 파일명, 품목명/항목코드)"""
+    contacts = ' '.join(str(name) for name in (customer_info.get('담당자명'), company_info.get('견적담당자명')) if name)
+    item_text = ' '.join(f"{item['품목명'] or ''} {item['항목코드'] or ''}" for item in items)
+    customer_name, subject, _ = _header_columns(customer_info)
+    return (estimate_id, customer_name, subject, contacts, filename, item_text)
+
+
+def _fts_query(query):
+    """검색어를 FTS5 질의로 변환 (모든 단어가 접두어로 일치해야 함)
+
+    HW-001처럼 기호가 섞인 단어도 구문(phrase)이 아닌 토큰별 조건으로 바꿉니다.
+    bm25는 질의의 구문마다 일치 문서 수를 세는데, 흔한 항목코드 구문은 위치 비교까지 해야 해 느립니다.
+    한 글자 토큰은 접두어 인덱스(2, 3글자)가 없어 모든 토큰을 훑게 되므로 정확히 일치하는 것만 찾습니다.
+    """
+    return ' '.join(f'"{token}"*' if len(token) > 1 else f'"{token}"'
+                    for token in re.findall(r'[^\W_]+', query))
+
+
+def _history_item(row):
+    """이력 조회 행(estimate_id, customer_name, subject, estimate_date, total_amount, filename,
+    created_at, version_num, is_final, is_latest)을 화면 표시용 dict로 변환"""
+    if row[8]:  # is_final
+        display_status = 'final'
+    else:
+        display_status = f"v{row[7]}"
+        if row[9]:  # is_latest
+            display_status = f"{display_status} [최신]"
+    
+    return {
+        'estimate_id': row[0],
+        '고객사명': row[1] or '',
+        '건명': row[2] or '',
+        '견적일자': row[3] or '',
+        '총금액': row[4] or 0,
+        '파일명': row[5] or '',
+        '최신본여부': display_status,
+        '생성일자': row[6],
+        '버전': row[7]
+    }
+
+
+def _store_contacts(cursor, customer_info, company_info):
+    """연락처를 customers/sales_reps에 저장(중복 제외)하고 (customer_id, sales_rep_id,
+    estimates에 남길 customer_info, company_info) 반환"""
+    customer_contact, customer_rest = split_contact(customer_info, CUSTOMER_CONTACT_FIELDS)
+    sales_rep, company_rest = split_contact(company_info, SALES_REP_FIELDS)
+    return (contact_id(cursor, "customers", customer_contact),
+            contact_id(cursor, "sales_reps", sales_rep),
+            customer_rest, company_rest)
+
+
+class DatabaseConfig:
+    """SQLite 연결 설정 (PRAGMA 및 문장 캐시)"""
+    def __init__(self, journal_mode="WAL", synchronous="NORMAL", busy_timeout=5000,
+                 cache_size=-16000, mmap_size=256 * 1024 * 1024, cached_statements=256,
+                 trace=SQL_TRACE_ENABLED, delta_storage=DELTA_STORAGE_ENABLED,
+                 snapshot_interval=DELTA_SNAPSHOT_INTERVAL):
+        self.journal_mode = journal_mode          # WAL: 읽기와 쓰기가 서로를 막지 않음
+        self.synchronous = synchronous            # WAL 모드에서는 NORMAL로도 안전
+        self.busy_timeout = busy_timeout          # 잠금 대기 시간 (ms)
+        self.cache_size = cache_size              # 음수는 KiB 단위 (-16000 = 약 16MB)
+        self.mmap_size = mmap_size                # 메모리 맵 I/O 크기 (bytes, 0이면 사용 안 함)
+        self.cached_statements = cached_statements  # 연결별 준비된 SQL 문 캐시 크기
+        self.trace = trace                        # 쿼리 추적 (query_trace.QueryTracer에 기록)
+        self.delta_storage = delta_storage        # 새 버전을 부모 대비 변경분으로 저장
+        self.snapshot_interval = snapshot_interval  # N번째 버전마다 전체 저장 (복원 시 델타 최대 N-1단계)
+
+    def key(self):
+        """연결 풀 구분용 키 (연결에 적용되지 않는 델타 저장 설정은 제외)"""
+        return (self.journal_mode, self.synchronous, self.busy_timeout,
+                self.cache_size, self.mmap_size, self.cached_statements, self.trace)
+
+
+class ConnectionManager:
+    """SQLite 연결 풀 (실행 중인 스레드마다 연결 하나, 종료된 스레드의 연결은 재사용)
+
+    같은 DB 파일과 설정을 사용하는 Database 인스턴스는 프로세스 안에서 하나의 풀을 공유합니다.
+    Streamlit은 rerun마다 새 ScriptRunner 스레드에서 Database를 새로 만들기 때문에 연결을
+    인스턴스나 스레드가 아닌 풀에 보관하고, 스레드가 종료되면 그 연결을 다음 스레드에 넘깁니다.
+    그래서 rerun마다 연결을 새로 열고 PRAGMA를 다시 적용하지 않습니다.
+    """
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    @classmethod
+    def get(cls, db_file, config):
+        """DB 파일/설정별 공유 연결 관리자 조회"""
+        if db_file == ":memory:":
+            key = (db_file, config.key())
+        else:
+            key = (os.path.abspath(db_file), config.key())
+        with cls._instances_lock:
+            manager = cls._instances.get(key)
+            if manager is None:
+                manager = cls(db_file, config)
+                cls._instances[key] = manager
+            return manager
+
+    def __init__(self, db_file, config):
+        self.db_file = db_file
+        self.config = config
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = {}  # thread ident -> (thread, connection)
+        self._idle = []  # 종료된 스레드가 쓰던 연결
+
+    def get_connection(self):
+        """현재 스레드의 연결 반환 (없으면 쉬는 연결을 넘겨받거나 새로 생성)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            with self._lock:
+                self._reclaim_dead_threads()
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                conn = self._connect()
+            self._local.conn = conn
+            with self._lock:
+                self._connections[threading.get_ident()] = (threading.current_thread(), conn)
+        if conn.in_transaction:
+            # 이전 호출(또는 이전 스레드)에서 정리되지 않은 트랜잭션이 남아 있으면 되돌림
+            conn.rollback()
+        return conn
+
+    def _connect(self):
+        """새 연결 생성 및 PRAGMA 적용"""
+        config = self.config
+        conn = sqlite3.connect(
+            self.db_file,
+            timeout=config.busy_timeout / 1000,
+            cached_statements=config.cached_statements,
+            factory=TracingConnection if config.trace else sqlite3.Connection,
+            # 종료된 스레드의 연결을 다른 스레드가 넘겨받으므로 생성 스레드 검사를 끔
+            # (한 연결은 항상 한 스레드만 사용)
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row  # 컬럼명으로 접근 가능하도록 설정
+        if self.db_file != ":memory:":
+            conn.execute(f"PRAGMA journal_mode={config.journal_mode}")
+        conn.execute(f"PRAGMA synchronous={config.synchronous}")
+        conn.execute(f"PRAGMA busy_timeout={int(config.busy_timeout)}")
+        conn.execute(f"PRAGMA cache_size={int(config.cache_size)}")
+        conn.execute(f"PRAGMA mmap_size={int(config.mmap_size)}")
+        return conn
+
+    def _reclaim_dead_threads(self):
+        """종료된 스레드의 연결을 쉬는 연결로 회수 (잠금 안에서 호출)"""
+        # 스레드 ident는 재사용될 수 있으므로 ident가 아닌 스레드 객체로 종료 여부 확인
+        for ident, (thread, conn) in list(self._connections.items()):
+            if not thread.is_alive():
+                del self._connections[ident]
+                self._idle.append(conn)
+
+    def close(self):
+        """현재 스레드의 연결 종료"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+            with self._lock:
+                self._connections.pop(threading.get_ident(), None)
+
 
 class Database:
-    def __init__(self, db_file="quotation.db"):
+    def __init__(self, db_file="quotation.db", config=None):
         self.db_file = db_file
+        self.config = config or DatabaseConfig()
+        self.connections = ConnectionManager.get(db_file, self.config)
         self.create_tables()
     
     def get_connection(self):
-        """데이터베이스 연결 생성"""
-        conn = sqlite3.connect(self.db_file)
-        conn.row_factory = sqlite3.Row  # 컬럼명으로 접근 가능하도록 설정
-        return conn
+        """현재 스레드의 공유 연결 조회"""
+        return self.connections.get_connection()
+
+    def close(self):
+        """현재 스레드의 연결 종료"""
+        self.connections.close()
     
     def create_tables(self):
-        """데이터베이스 테이블 생성"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        try:
-            # estimates 테이블 생성
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS estimates (
-                estimate_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                root_id INTEGER,
-                parent_id INTEGER,
-                filename TEXT NOT NULL,
-                customer_info TEXT NOT NULL,
-                company_info TEXT NOT NULL,
-                total_amount REAL,
-                is_final BOOLEAN DEFAULT FALSE,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (parent_id) REFERENCES estimates(estimate_id),
-                FOREIGN KEY (root_id) REFERENCES estimates(estimate_id)
-            )
-            ''')
-            
-            # estimate_items 테이블 생성
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS estimate_items (
-                item_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                estimate_id INTEGER NOT NULL,
-                item_code TEXT,
-                item_name TEXT,
-                unit TEXT,
-                quantity INTEGER,
-                unit_price REAL,
-                amount REAL,
-                FOREIGN KEY (estimate_id) REFERENCES estimates(estimate_id)
-            )
-            ''')
-            
-            conn.commit()
-        finally:
-            cursor.close()
-            conn.close()
+        """데이터베이스 테이블 생성 및 스키마 마이그레이션 (프로세스당 1회)"""
+        migrate(self.get_connection(), self.db_file)
 
+    @timed("database.get_estimate_version")
     def get_estimate_version(self, estimate_id):
         """견적서의 현재 버전 번호 조회"""
         conn = self.get_connection()
         cursor = conn.cursor()
         try:
-            cursor.execute("""
-                SELECT COUNT(*) 
-                FROM estimates 
-                WHERE root_id = (
-                    SELECT root_id 
-                    FROM estimates 
-                    WHERE estimate_id = ?
-                )
-                AND created_at <= (
-                    SELECT created_at 
-                    FROM estimates 
-                    WHERE estimate_id = ?
-                )
-            """, (estimate_id, estimate_id))
-            version = cursor.fetchone()[0]
-            return version
+            cursor.execute("SELECT version_num FROM estimates WHERE estimate_id = ?", (estimate_id,))
+            row = cursor.fetchone()
+            return row[0] if row and row[0] else 0
         finally:
             cursor.close()
-            conn.close()
 
+    @timed("database.save_estimate")
     def save_estimate(self, customer_info, company_info, items, total_amount, filename, parent_id=None, is_final=False):
-        """견적서 저장"""
+        """견적서 저장
+
+        filename에 버전('v3', 'final')을 받아 파일명을 만드는 함수를 주면 이 트랜잭션에서 실제로
+        정해진 버전으로 파일명을 만듭니다 (같은 부모에 동시에 저장해도 파일명과 버전이 일치).
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
         
         try:
-            # 트랜잭션 시작
-            conn.execute("BEGIN TRANSACTION")
-            
-            # 최상위 부모 ID 찾기 또는 설정
-            root_id = None
-            if parent_id:
-                cursor.execute("SELECT root_id FROM estimates WHERE estimate_id = ?", (parent_id,))
-                result = cursor.fetchone()
-                if result:
-                    root_id = result[0]
-            
-            # final 버전이 있는지 확인
-            estimate_id = None
-            if root_id:
-                cursor.execute("""
-                    SELECT estimate_id FROM estimates 
-                    WHERE root_id = ? AND is_final = 1
-                """, (root_id,))
-                final_id = cursor.fetchone()
-                
-                if final_id and is_final:
-                    # final 버전이 있으면 해당 ID를 사용
-                    estimate_id = final_id[0]
-                    # final 버전 업데이트
-                    cursor.execute("""
-                        UPDATE estimates SET
-                        customer_info = ?,
-                        company_info = ?,
-                        total_amount = ?,
-                        filename = ?,
-                        updated_at = CURRENT_TIMESTAMP
-                        WHERE estimate_id = ?
-                    """, (json.dumps(customer_info), json.dumps(company_info), 
-                         total_amount, filename, estimate_id))
-                else:
-                    # 새 버전 저장
-                    cursor.execute("""
-                        INSERT INTO estimates (
-                            customer_info, company_info, total_amount, filename,
-                            parent_id, root_id, is_final, created_at, updated_at
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
-                    """, (json.dumps(customer_info), json.dumps(company_info), 
-                         total_amount, filename, parent_id, root_id, is_final))
-                    estimate_id = cursor.lastrowid
-            else:
-                # 최초 저장
-                cursor.execute("""
-                    INSERT INTO estimates (
-                        customer_info, company_info, total_amount, filename,
-                        is_final, created_at, updated_at
-                    ) VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
-                """, (json.dumps(customer_info), json.dumps(company_info), 
-                     total_amount, filename, is_final))
-                estimate_id = cursor.lastrowid
-                
-                # root_id 설정
-                if estimate_id:
-                    cursor.execute("""
-                        UPDATE estimates SET root_id = ? WHERE estimate_id = ?
-                    """, (estimate_id, estimate_id))
+            # 트랜잭션 시작 (버전 번호를 읽은 뒤 쓰므로 처음부터 쓰기 잠금을 잡아 동시 저장 시
+            # 읽기→쓰기 잠금 승격 실패(database is locked)가 나지 않도록 함)
+            conn.execute("BEGIN IMMEDIATE")
             
-            if estimate_id:
-                # 기존 아이템 삭제 (final 버전 업데이트의 경우)
-                cursor.execute("DELETE FROM estimate_items WHERE estimate_id = ?", (estimate_id,))
-                
-                # 새 아이템 저장
-                for item in items:
-                    cursor.execute("""
-                        INSERT INTO estimate_items (
-                            estimate_id, item_code, item_name, unit, 
-                            quantity, unit_price, amount
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """, (estimate_id, item['항목코드'], item['품목명'], 
-                         item['단위'], item['수량'], item['단가'], item['금액']))
+            estimate_id = self._save_estimate_tx(
+                cursor, customer_info, company_info, items, total_amount,
+                filename, parent_id, is_final
+            )
             
             # 트랜잭션 커밋
             conn.commit()
@@ -176,8 +399,372 @@ class Database:
             raise e
         finally:
             cursor.close()
-            conn.close()
 
+    def _save_estimate_tx(self, cursor, customer_info, company_info, items, total_amount,
+                          filename, parent_id=None, is_final=False):
+        """열린 트랜잭션 안에서 견적서 한 건 저장 (커밋은 호출자가 담당)"""
+        # 최상위 부모 ID 찾기 또는 설정
+        root_id = None
+        if parent_id:
+            cursor.execute("SELECT root_id FROM estimates WHERE estimate_id = ?", (parent_id,))
+            result = cursor.fetchone()
+            if result:
+                root_id = result[0]
+        
+        # 연락처는 customers/sales_reps에 한 번만 저장하고 ID로 참조
+        customer_id, sales_rep_id, customer_rest, company_rest = _store_contacts(
+            cursor, customer_info, company_info)
+        
+        # final 버전이 있는지 확인
+        estimate_id = None
+        item_deltas = None
+        if root_id:
+            cursor.execute("""
+                SELECT estimate_id FROM estimates 
+                WHERE root_id = ? AND is_final = 1
+            """, (root_id,))
+            final_id = cursor.fetchone()
+            
+            if final_id and is_final:
+                # final 버전이 있으면 해당 ID를 사용
+                estimate_id = final_id[0]
+                filename = _resolve_filename(filename, "final")
+                # 덮어쓰기 전에 이 버전을 기준으로 저장된 델타 버전을 전체 저장으로 전환
+                self._materialize_dependents(cursor, estimate_id)
+                # final 버전 업데이트 (final은 자주 조회되므로 항상 전체 저장)
+                cursor.execute("""
+                    UPDATE estimates SET
+                    customer_info = ?,
+                    company_info = ?,
+                    customer_id = ?,
+                    sales_rep_id = ?,
+                    customer_name = ?,
+                    subject = ?,
+                    estimate_date = ?,
+                    total_amount = ?,
+                    filename = ?,
+                    delta_base_id = NULL,
+                    delta_depth = 0,
+                    updated_at = CURRENT_TIMESTAMP
+                    WHERE estimate_id = ?
+                """, (json.dumps(customer_rest), json.dumps(company_rest), customer_id, sales_rep_id,
+                     *_header_columns(customer_info),
+                     total_amount, filename, estimate_id))
+                cursor.execute("DELETE FROM estimate_item_deltas WHERE estimate_id = ?", (estimate_id,))
+                cursor.execute("DELETE FROM estimate_search WHERE rowid = ?", (estimate_id,))
+            else:
+                # 새 버전 번호 계산 및 기존 최신본 표시 해제
+                cursor.execute("""
+                    SELECT COALESCE(MAX(version_num), 0) + 1 FROM estimates WHERE root_id = ?
+                """, (root_id,))
+                version_num = cursor.fetchone()[0]
+                filename = _resolve_filename(filename, "final" if is_final else f"v{version_num}")
+                cursor.execute("""
+                    UPDATE estimates SET is_latest = 0 WHERE root_id = ? AND is_latest = 1
+                """, (root_id,))
+                
+                # 델타 저장 모드면 부모 대비 변경분만 저장 (final은 항상 전체 저장)
+                delta = None
+                if self.config.delta_storage and not is_final:
+                    delta = self._plan_delta(cursor, parent_id, customer_rest, company_rest, items)
+                if delta:
+                    delta_base_id = parent_id
+                    delta_depth, customer_json, company_json, item_deltas = delta
+                else:
+                    delta_base_id = None
+                    delta_depth = 0
+                    customer_json = json.dumps(customer_rest)
+                    company_json = json.dumps(company_rest)
+                
+                # 새 버전 저장
+                cursor.execute("""
+                    INSERT INTO estimates (
+                        customer_info, company_info, customer_id, sales_rep_id,
+                        customer_name, subject, estimate_date,
+                        total_amount, filename,
+                        parent_id, root_id, is_final, version_num, is_latest,
+                        delta_base_id, delta_depth, created_at, updated_at
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+                """, (customer_json, company_json, customer_id, sales_rep_id,
+                     *_header_columns(customer_info),
+                     total_amount, filename, parent_id, root_id, is_final, version_num,
+                     delta_base_id, delta_depth))
+                estimate_id = cursor.lastrowid
+        else:
+            # 최초 저장
+            filename = _resolve_filename(filename, "final" if is_final else "v1")
+            cursor.execute("""
+                INSERT INTO estimates (
+                    customer_info, company_info, customer_id, sales_rep_id,
+                    customer_name, subject, estimate_date,
+                    total_amount, filename,
+                    is_final, version_num, is_latest, created_at, updated_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, 1, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+            """, (json.dumps(customer_rest), json.dumps(company_rest), customer_id, sales_rep_id,
+                 *_header_columns(customer_info),
+                 total_amount, filename, is_final))
+            estimate_id = cursor.lastrowid
+            
+            # root_id 설정
+            if estimate_id:
+                cursor.execute("""
+                    UPDATE estimates SET root_id = ? WHERE estimate_id = ?
+                """, (estimate_id, estimate_id))
+        
+        if estimate_id:
+            # 기존 아이템 삭제 (final 버전 업데이트의 경우)
+            cursor.execute("DELETE FROM estimate_items WHERE estimate_id = ?", (estimate_id,))
+            
+            # 새 아이템 저장
+            if item_deltas is not None:
+                cursor.executemany(INSERT_ITEM_DELTA_SQL,
+                                   ((estimate_id, *delta) for delta in item_deltas))
+            else:
+                cursor.executemany(INSERT_ITEM_SQL, _item_rows(estimate_id, items))
+            
+            # 전문 검색 인덱스 (델타 저장 여부와 관계없이 전체 내용으로 색인)
+            cursor.execute(INSERT_SEARCH_SQL,
+                           _search_row(estimate_id, customer_info, company_info, filename, items))
+        
+        return estimate_id
+
+    def _plan_delta(self, cursor, parent_id, customer_info, company_info, items):
+        """부모 대비 변경분 저장 내용 (delta_depth, customer_info JSON, company_info JSON, 항목 변경분)
+
+        customer_info/company_info는 연락처 필드를 뺀 estimates 저장용 dict입니다.
+
+        스냅샷 주기에 도달했거나 변경분이 전체 저장보다 작지 않으면 None (전체 저장)을 반환합니다.
+        """
+        cursor.execute("SELECT delta_depth FROM estimates WHERE estimate_id = ?", (parent_id,))
+        row = cursor.fetchone()
+        if not row:
+            return None
+        depth = (row[0] or 0) + 1
+        if depth >= self.config.snapshot_interval:
+            return None
+
+        base = self._reconstruct(cursor, parent_id)
+        if base is None:
+            return None
+        base_customer, base_company, base_items = base
+        customer_delta = _dict_delta(base_customer, customer_info)
+        company_delta = _dict_delta(base_company, company_info)
+        item_deltas = _item_delta(base_items, items)
+        if customer_delta is None or company_delta is None or item_deltas is None:
+            return None
+        if len(item_deltas) >= len(items):
+            return None
+        return depth, json.dumps(customer_delta), json.dumps(company_delta), item_deltas
+
+    def _reconstruct(self, cursor, estimate_id):
+        """델타 체인을 따라 견적서의 (customer_info, company_info, 항목 목록) 복원 (없으면 None)
+
+        customer_info/company_info는 estimates에 저장된 필드만 담으며 연락처는 포함하지 않습니다.
+        """
+        cursor.execute("""
+            WITH RECURSIVE chain(estimate_id, depth) AS (
+                SELECT ?, 0
+                UNION ALL
+                SELECT e.delta_base_id, chain.depth + 1
+                FROM estimates e JOIN chain ON e.estimate_id = chain.estimate_id
+                WHERE e.delta_base_id IS NOT NULL
+            )
+            SELECT e.estimate_id, e.customer_info, e.company_info, e.delta_base_id
+            FROM chain JOIN estimates e ON e.estimate_id = chain.estimate_id
+            ORDER BY chain.depth DESC
+        """, (estimate_id,))
+        chain = cursor.fetchall()
+        if not chain or chain[0][3] is not None or chain[-1][0] != estimate_id:
+            return None
+
+        # 전체 저장본부터 순서대로 바뀐 필드를 덮어씀
+        customer_info = {}
+        company_info = {}
+        for row in chain:
+            customer_info.update(json.loads(row[1]))
+            company_info.update(json.loads(row[2]))
+
+        cursor.execute("""
+            SELECT item_code, item_name, unit, quantity, unit_price, amount
+            FROM estimate_items WHERE estimate_id = ?
+        """, (chain[0][0],))
+        items = [_item_dict(row) for row in cursor.fetchall()]
+
+        delta_ids = [row[0] for row in chain[1:]]
+        if delta_ids:
+            cursor.execute(f"""
+                SELECT estimate_id, item_code, position, item_name, unit, quantity, unit_price, amount
+                FROM estimate_item_deltas
+                WHERE estimate_id IN ({', '.join('?' * len(delta_ids))})
+                ORDER BY delta_id
+            """, delta_ids)
+            deltas = {delta_id: [] for delta_id in delta_ids}
+            for row in cursor.fetchall():
+                deltas[row[0]].append(tuple(row[1:]))
+            for delta_id in delta_ids:
+                items = _apply_item_delta(items, deltas[delta_id])
+        return customer_info, company_info, items
+
+    def _materialize_dependents(self, cursor, estimate_id):
+        """estimate_id를 기준으로 저장된 델타 버전들을 전체 저장으로 전환 (기준 버전을 덮어쓰기 전 호출)"""
+        cursor.execute("SELECT estimate_id FROM estimates WHERE delta_base_id = ?", (estimate_id,))
+        for (dependent_id,) in cursor.fetchall():
+            customer_info, company_info, items = self._reconstruct(cursor, dependent_id)
+            # 이 버전을 기준으로 한 하위 델타의 delta_depth는 실제보다 커지지만 스냅샷 시점만 앞당겨질 뿐임
+            cursor.execute("""
+                UPDATE estimates SET
+                customer_info = ?, company_info = ?, delta_base_id = NULL, delta_depth = 0
+                WHERE estimate_id = ?
+            """, (json.dumps(customer_info), json.dumps(company_info), dependent_id))
+            cursor.execute("DELETE FROM estimate_item_deltas WHERE estimate_id = ?", (dependent_id,))
+            cursor.executemany(INSERT_ITEM_SQL, _item_rows(dependent_id, items))
+
+    @timed("database.save_estimates_bulk", rows=lambda result: len(result['ids']))
+    def save_estimates_bulk(self, estimates, batch_size=500, prepare=None, on_saved=None):
+        """견적서 대량 저장
+
+        estimates는 save_estimate 인자(customer_info, company_info, items, total_amount,
+        filename, parent_id, is_final)를 담은 dict의 iterable이며, batch_size 건씩 읽어
+        배치마다 한 번 커밋합니다. prepare를 주면 각 레코드를 이 형식으로 변환하는 데 사용합니다.
+        on_saved(cursor, record, estimate_id)는 저장된 레코드마다 같은 트랜잭션 안에서 호출됩니다.
+        filename은 save_estimate와 같이 버전을 받아 파일명을 만드는 함수여도 됩니다.
+
+        parent_id가 없는 신규 견적서는 ID를 미리 할당해 헤더/항목을 executemany로 저장하고,
+        버전 체인에 추가되는 레코드는 한 건씩 SAVEPOINT로 저장합니다.
+        실패한 레코드는 해당 레코드만 되돌리고 나머지는 계속 저장합니다.
+
+        반환값: {'ids': 입력 순서대로의 estimate_id (실패 시 None),
+                 'failures': [{'index', 'filename', 'error'}, ...]}
+        """
+        result = {'ids': [], 'failures': []}
+        conn = self.get_connection()
+        records = iter(estimates)
+        offset = 0
+        
+        while True:
+            batch = list(itertools.islice(records, batch_size))
+            if not batch:
+                break
+            
+            cursor = conn.cursor()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                ids = self._save_batch_tx(cursor, batch, offset, prepare, on_saved, result['failures'])
+                conn.commit()
+                result['ids'].extend(ids)
+            except Exception as e:
+                conn.rollback()
+                print(f"견적서 대량 저장 중 오류 발생: {str(e)}")
+                raise e
+            finally:
+                cursor.close()
+            offset += len(batch)
+        
+        return result
+
+    def _save_batch_tx(self, cursor, batch, offset, prepare, on_saved, failures):
+        """열린 트랜잭션 안에서 한 배치 저장 후 배치 내 순서대로의 ID 목록 반환"""
+        ids = [None] * len(batch)
+        roots = []     # (배치 내 위치, 레코드) - executemany 대상
+        versions = []  # (배치 내 위치, 레코드) - 한 건씩 저장
+        
+        for pos, record in enumerate(batch):
+            try:
+                if prepare:
+                    record = prepare(record)
+                customer_contact, customer_rest = split_contact(record['customer_info'], CUSTOMER_CONTACT_FIELDS)
+                sales_rep, company_rest = split_contact(record['company_info'], SALES_REP_FIELDS)
+                # 신규 견적서는 버전이 v1/final로 정해져 있으므로 파일명을 미리 생성
+                # (버전 체인에 추가되는 레코드는 _save_estimate_tx에서 생성)
+                filename = record['filename']
+                if not record.get('parent_id'):
+                    filename = _resolve_filename(filename, "final" if record.get('is_final') else "v1")
+                header = (
+                    json.dumps(customer_rest),
+                    json.dumps(company_rest),
+                    *_header_columns(record['customer_info']),
+                    record['total_amount'],
+                    filename,
+                    record.get('is_final', False)
+                )
+                item_values = list(_item_rows(None, record['items']))
+            except Exception as e:
+                failures.append(_bulk_failure(offset + pos, record, e))
+                continue
+            
+            if record.get('parent_id'):
+                versions.append((pos, record))
+            else:
+                roots.append((pos, header, (customer_contact, sales_rep), item_values, record))
+        
+        if roots:
+            cursor.execute("SAVEPOINT bulk_roots")
+            try:
+                # AUTOINCREMENT 규칙에 맞게 sqlite_sequence와 현재 최대 ID 이후 번호를 미리 할당
+                cursor.execute("""
+                    SELECT MAX(
+                        COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'estimates'), 0),
+                        COALESCE((SELECT MAX(estimate_id) FROM estimates), 0)
+                    )
+                """)
+                next_id = cursor.fetchone()[0] + 1
+                header_rows = []
+                item_rows = []
+                contact_ids = {}  # 배치 안에서 반복되는 연락처 조회 생략 (이 SAVEPOINT 안에서만 유효)
+                for i, (pos, header, (customer_contact, sales_rep), item_values, record) in enumerate(roots):
+                    estimate_id = next_id + i
+                    header_rows.append((estimate_id, estimate_id,
+                                        contact_id(cursor, "customers", customer_contact, contact_ids),
+                                        contact_id(cursor, "sales_reps", sales_rep, contact_ids),
+                                        *header))
+                    item_rows.extend((estimate_id, *values[1:]) for values in item_values)
+                
+                cursor.executemany("""
+                    INSERT INTO estimates (
+                        estimate_id, root_id, customer_id, sales_rep_id,
+                        customer_info, company_info, customer_name, subject, estimate_date,
+                        total_amount, filename,
+                        is_final, version_num, is_latest, created_at, updated_at
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, 1, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+                """, header_rows)
+                cursor.executemany(INSERT_ITEM_SQL, item_rows)
+                cursor.executemany(INSERT_SEARCH_SQL, (
+                    _search_row(next_id + i, record['customer_info'], record['company_info'],
+                                header[6], record['items'])
+                    for i, (_, header, _, _, record) in enumerate(roots)
+                ))
+                if on_saved:
+                    for i, (pos, _, _, _, record) in enumerate(roots):
+                        on_saved(cursor, record, next_id + i)
+                cursor.execute("RELEASE bulk_roots")
+                for i, (pos, _, _, _, record) in enumerate(roots):
+                    ids[pos] = next_id + i
+            except Exception:
+                # 일괄 저장이 실패하면 되돌린 뒤 한 건씩 저장해 실패 레코드만 걸러냄
+                cursor.execute("ROLLBACK TO bulk_roots")
+                cursor.execute("RELEASE bulk_roots")
+                versions = sorted(versions + [(pos, record) for pos, _, _, _, record in roots],
+                                  key=lambda entry: entry[0])
+        
+        for pos, record in versions:
+            cursor.execute("SAVEPOINT bulk_record")
+            try:
+                ids[pos] = self._save_estimate_tx(
+                    cursor, record['customer_info'], record['company_info'], record['items'],
+                    record['total_amount'], record['filename'],
+                    record.get('parent_id'), record.get('is_final', False)
+                )
+                if on_saved:
+                    on_saved(cursor, record, ids[pos])
+                cursor.execute("RELEASE bulk_record")
+            except Exception as e:
+                cursor.execute("ROLLBACK TO bulk_record")
+                cursor.execute("RELEASE bulk_record")
+                failures.append(_bulk_failure(offset + pos, record, e))
+        
+        return ids
+
+    @timed("database.load_estimate", rows=lambda result: len(result[1] or []))
     def load_estimate(self, estimate_id):
         """견적서 불러오기"""
         conn = self.get_connection()
@@ -185,124 +772,182 @@ class Database:
         
         try:
             # 견적서 기본 정보 조회
-            cursor.execute("""
-                SELECT customer_info, company_info, total_amount, is_final, estimate_id
-                FROM estimates WHERE estimate_id = ?
-            """, (estimate_id,))
+            cursor.execute(ESTIMATE_HEADER_SQL + "WHERE e.estimate_id = ?", (estimate_id,))
             row = cursor.fetchone()
             
             if not row:
                 return None, None
-                
-            customer_info = json.loads(row[0])
-            company_info = json.loads(row[1])
-            estimate_data = {
-                **customer_info,
-                **company_info,
-                'estimate_id': row[4],
-                'is_final': row[3]
-            }
-            
-            # 견적 항목 조회
-            cursor.execute("""
-                SELECT item_code, item_name, unit, quantity, unit_price, amount
-                FROM estimate_items WHERE estimate_id = ?
-            """, (estimate_id,))
             
-            items = []
-            for item_row in cursor.fetchall():
-                items.append({
-                    '항목코드': item_row[0],
-                    '품목명': item_row[1],
-                    '단위': item_row[2],
-                    '수량': item_row[3],
-                    '단가': item_row[4],
-                    '금액': item_row[5]
-                })
+            if row[5] is not None:
+                # 델타로 저장된 버전은 전체 저장본부터 변경분을 적용해 복원
+                reconstructed = self._reconstruct(cursor, row[4])
+                if reconstructed is None:
+                    raise Exception(f"견적서 {row[4]}의 버전 변경분을 복원할 수 없습니다.")
+                customer_info, company_info, items = reconstructed
+            else:
+                customer_info = json.loads(row[0])
+                company_info = json.loads(row[1])
                 
-            return estimate_data, items
+                # 견적 항목 조회
+                cursor.execute("""
+                    SELECT item_code, item_name, unit, quantity, unit_price, amount
+                    FROM estimate_items WHERE estimate_id = ?
+                """, (estimate_id,))
+                items = [_item_dict(item_row) for item_row in cursor.fetchall()]
+            
+            return _estimate_data(row, customer_info, company_info), items
             
         finally:
             cursor.close()
-            conn.close()
 
-    def get_estimate_history(self):
-        """견적서 이력 조회"""
+    def load_estimates(self, estimate_ids, chunk_size=500):
+        """여러 견적서를 (estimate_data, items)로 입력 순서대로 하나씩 반환하는 제너레이터
+
+        chunk_size 건씩 헤더/항목을 IN 조회 두 번으로 불러오므로 ID 목록이 커도 메모리는
+        한 묶음 분량만 사용합니다. 없는 ID는 load_estimate와 같이 (None, None)을 반환합니다.
+        델타로 저장된 버전은 한 건씩 복원합니다.
+        """
+        estimate_ids = iter(estimate_ids)
+        while True:
+            chunk = list(itertools.islice(estimate_ids, chunk_size))
+            if not chunk:
+                break
+            # 다음 yield 전에 조회를 끝내고 커서를 닫아 호출자가 중간에 다른 DB 작업을 해도 되도록 함
+            with timer("database.load_estimates") as context:
+                loaded = self._load_chunk(chunk)
+                context['rows'] = len(chunk)
+            for estimate_id in chunk:
+                yield loaded.get(estimate_id, (None, None))
+
+    def _load_chunk(self, estimate_ids):
+        """estimate_id → (estimate_data, items) dict (없는 ID는 제외)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            unique_ids = list(dict.fromkeys(estimate_ids))
+            placeholders = ', '.join('?' * len(unique_ids))
+            cursor.execute(ESTIMATE_HEADER_SQL + f"WHERE e.estimate_id IN ({placeholders})", unique_ids)
+            headers = cursor.fetchall()
+
+            # 항목은 estimate_id 순으로 한 번에 조회해 한 번 순회로 묶음
+            items_by_id = {}
+            cursor.execute(f"""
+                SELECT estimate_id, item_code, item_name, unit, quantity, unit_price, amount
+                FROM estimate_items WHERE estimate_id IN ({placeholders})
+                ORDER BY estimate_id, item_id
+            """, unique_ids)
+            current_id = None
+            for row in cursor.fetchall():
+                if row[0] != current_id:
+                    current_id = row[0]
+                    items = items_by_id[current_id] = []
+                items.append(_item_dict(row[1:]))
+
+            loaded = {}
+            contacts = {}  # 같은 고객/담당자 연락처는 묶음 안에서 한 번만 파싱
+            for row in headers:
+                if row[5] is not None:
+                    reconstructed = self._reconstruct(cursor, row[4])
+                    if reconstructed is None:
+                        raise Exception(f"견적서 {row[4]}의 버전 변경분을 복원할 수 없습니다.")
+                    customer_info, company_info, items = reconstructed
+                else:
+                    customer_info = json.loads(row[0])
+                    company_info = json.loads(row[1])
+                    items = items_by_id.get(row[4], [])
+                loaded[row[4]] = (_estimate_data(row, customer_info, company_info, contacts), items)
+            return loaded
+        finally:
+            cursor.close()
+
+    @timed("database.find_estimates", rows=len)
+    def find_estimates(self, finals_only=False, customer=None, date_from=None, date_to=None):
+        """조건에 맞는 견적서의 (estimate_id, 파일명, 총금액) 목록 (estimate_id 순)
+
+        customer는 고객사명 부분 일치, date_from/date_to는 견적일자 범위(포함)로 필터링합니다.
+        """
+        conn = self.get_connection()
+        conditions = []
+        params = []
+        if finals_only:
+            conditions.append("is_final = 1")
+        if customer:
+            conditions.append("customer_name LIKE ?")
+            params.append(f"%{customer}%")
+        if date_from:
+            conditions.append("estimate_date >= ?")
+            params.append(str(date_from))
+        if date_to:
+            conditions.append("estimate_date <= ?")
+            params.append(str(date_to))
+        where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = conn.execute(f"""
+            SELECT estimate_id, filename, total_amount FROM estimates
+            {where_sql}
+            ORDER BY estimate_id
+        """, params).fetchall()
+        return [(row[0], row[1], row[2]) for row in rows]
+
+    @staticmethod
+    def history_cursor(history_item):
+        """이력 항목의 다음 페이지 커서 (created_at, estimate_id)"""
+        return (history_item['생성일자'], history_item['estimate_id'])
+
+    @timed("database.get_estimate_history", rows=len)
+    def get_estimate_history(self, limit=None, after_cursor=None, customer=None,
+                             date_from=None, date_to=None, latest_only=False):
+        """견적서 이력 조회 (최신순)
+
+        (created_at, estimate_id) 기준 키셋 페이지네이션을 사용합니다.
+        다음 페이지는 이전 페이지 마지막 항목의 history_cursor()를 after_cursor로 넘겨 조회합니다.
+        customer는 고객사명 부분 일치, date_from/date_to는 견적일자 범위(포함)로 필터링합니다.
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
         
         try:
-            cursor.execute("""
-                WITH LatestVersions AS (
-                    SELECT 
-                        root_id, 
-                        MAX(created_at) as latest_created_at,
-                        MAX(CASE WHEN is_final = 1 THEN estimate_id ELSE NULL END) as final_id,
-                        COUNT(*) as version_count
-                    FROM estimates
-                    GROUP BY root_id
-                ),
-                VersionNumbers AS (
-                    SELECT 
-                        e.estimate_id,
-                        e.root_id,
-                        ROW_NUMBER() OVER (PARTITION BY e.root_id ORDER BY e.created_at) as version_num
-                    FROM estimates e
-                )
+            conditions = []
+            params = []
+            if after_cursor:
+                conditions.append("(e.created_at, e.estimate_id) < (?, ?)")
+                params.extend(after_cursor)
+            if customer:
+                conditions.append("e.customer_name LIKE ?")
+                params.append(f"%{customer}%")
+            if date_from:
+                conditions.append("e.estimate_date >= ?")
+                params.append(str(date_from))
+            if date_to:
+                conditions.append("e.estimate_date <= ?")
+                params.append(str(date_to))
+            if latest_only:
+                conditions.append("(e.is_latest = 1 OR e.is_final = 1)")
+
+            where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+            limit_sql = ""
+            if limit:
+                limit_sql = "LIMIT ?"
+                params.append(int(limit))
+
+            cursor.execute(f"""
                 SELECT 
                     e.estimate_id,
-                    json_extract(e.customer_info, '$.고객사명') as customer_name,
-                    json_extract(e.customer_info, '$.건명') as subject,
-                    json_extract(e.customer_info, '$.견적일자') as estimate_date,
+                    e.customer_name,
+                    e.subject,
+                    e.estimate_date,
                     e.total_amount,
                     e.filename,
-                    CASE 
-                        WHEN e.is_final = 1 THEN 'final'
-                        ELSE 'v' || vn.version_num
-                    END as version_status,
                     e.created_at,
-                    vn.version_num,
-                    lv.version_count,
+                    e.version_num,
                     e.is_final,
-                    CASE 
-                        WHEN e.is_final = 1 THEN TRUE
-                        WHEN e.created_at = lv.latest_created_at THEN TRUE
-                        ELSE FALSE
-                    END as is_latest
+                    e.is_latest
                 FROM estimates e
-                LEFT JOIN LatestVersions lv ON e.root_id = lv.root_id
-                LEFT JOIN VersionNumbers vn ON e.estimate_id = vn.estimate_id
-                ORDER BY e.created_at DESC
-            """)
-            
-            history = []
-            rows = cursor.fetchall()
-            
-            if rows:
-                for row in rows:
-                    status = row[6]  # version_status
-                    is_latest = row[11]  # is_latest
-                    
-                    if row[10]:  # is_final
-                        display_status = 'final'
-                    else:
-                        display_status = status
-                        if is_latest:
-                            display_status = f"{status} [최신]"
-                    
-                    history.append({
-                        'estimate_id': row[0],
-                        '고객사명': row[1] or '',
-                        '건명': row[2] or '',
-                        '견적일자': row[3] or '',
-                        '총금액': row[4] or 0,
-                        '파일명': row[5] or '',
-                        '최신본여부': display_status,
-                        '생성일자': row[7],
-                        '버전': row[8]
-                    })
+                {where_sql}
+                ORDER BY e.created_at DESC, e.estimate_id DESC
+                {limit_sql}
+            """, params)
             
-            return history
+            return [_history_item(row) for row in cursor.fetchall()]
             
         except Exception as e:
             print(f"견적서 이력 조회 중 오류 발생: {str(e)}")
@@ -310,4 +955,62 @@ class Database:
             
         finally:
             cursor.close()
-            conn.close() 
\ No newline at end of file
+
+    @timed("database.search_estimates", rows=lambda result: len(result['items']))
+    def search_estimates(self, query, limit=50, latest_only=False):
+        """고객사명/건명/담당자명/파일명/품목명·항목코드 전문 검색 (관련도순)
+
+        검색어의 단어가 모두 (접두어로) 포함된 견적서를 bm25 점수순으로 limit건 반환합니다.
+        일치하는 견적서가 SEARCH_CANDIDATES건보다 많으면 최근 견적서 SEARCH_CANDIDATES건 중에서만
+        순위를 매기고 truncated를 True로 반환합니다 (latest_only 조건은 후보를 자르기 전에 적용).
+        반환값: {'items': get_estimate_history와 같은 형식에 '점수'(낮을수록 관련도 높음)가 추가된 목록,
+                 'truncated': 후보 제한으로 오래된 일치 견적서가 순위에서 빠졌는지 여부}
+        """
+        fts_query = _fts_query(query or '')
+        if not fts_query:
+            return {'items': [], 'truncated': False}
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            latest_sql = "AND (e.is_latest = 1 OR e.is_final = 1)" if latest_only else ""
+            # 전체 일치 건을 점수순으로 정렬하면 흔한 단어는 100만 건 기준 1초 이상 걸리므로
+            # 후보가 많으면 최근 SEARCH_CANDIDATES건으로 제한 (다음 행이 있으면 잘린 것)
+            cursor.execute(f"""
+                SELECT estimate_search.rowid FROM estimate_search
+                JOIN estimates e ON e.estimate_id = estimate_search.rowid
+                WHERE estimate_search MATCH ? {latest_sql}
+                ORDER BY estimate_search.rowid DESC LIMIT 2 OFFSET ?
+            """, (fts_query, SEARCH_CANDIDATES - 1))
+            rows = cursor.fetchall()
+            min_id = rows[0][0] if rows else 0
+            truncated = len(rows) > 1
+            
+            cursor.execute(f"""
+                SELECT 
+                    e.estimate_id,
+                    e.customer_name,
+                    e.subject,
+                    e.estimate_date,
+                    e.total_amount,
+                    e.filename,
+                    e.created_at,
+                    e.version_num,
+                    e.is_final,
+                    e.is_latest,
+                    bm25(estimate_search, {', '.join(str(weight) for weight in SEARCH_WEIGHTS)}) AS score
+                FROM estimate_search
+                JOIN estimates e ON e.estimate_id = estimate_search.rowid
+                WHERE estimate_search MATCH ? AND estimate_search.rowid >= ? {latest_sql}
+                ORDER BY score, e.estimate_id DESC
+                LIMIT ?
+            """, (fts_query, min_id, int(limit)))
+            items = [{**_history_item(row), '점수': row[10]} for row in cursor.fetchall()]
+            return {'items': items, 'truncated': truncated}
+            
+        except Exception as e:
+            print(f"견적서 검색 중 오류 발생: {str(e)}")
+            return {'items': [], 'truncated': False}
+            
+        finally:
+            cursor.close()
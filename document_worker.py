@@ -0,0 +1,42 @@
+# 프로세스 풀에서 견적서 문서(PDF/HTML)를 파일로 생성하는 작업 함수
+# (rerender_archive.py / order_feed.py 공용)
+
+import os
+import time
+
+from estimate_template import EstimateTemplate
+from pdf_renderer import PdfRenderer
+
+FORMATS = {'pdf': ['pdf'], 'html': ['html'], 'both': ['pdf', 'html']}
+
+_renderer = None
+
+
+def init_worker(font_file):
+    """작업 프로세스 초기화 (폰트 메트릭은 프로세스당 한 번만 로드)"""
+    global _renderer
+    _renderer = PdfRenderer(font_file)
+
+
+def output_name(estimate_id, filename, kind):
+    """문서 파일 이름 (파일명은 같은 고객사/건명/날짜/버전이면 겹치므로 estimate_id를 붙임)"""
+    return f"{filename}_id{estimate_id}.{kind}"
+
+
+def render_to_files(task):
+    """견적서 한 건 렌더링 후 파일 저장, (estimate_id, 파일명, 소요 시간, 크기, 오류) 반환"""
+    estimate_id, filename, kinds, customer_info, company_info, items, total, out_dir = task
+    started = time.perf_counter()
+    size = 0
+    try:
+        for kind in kinds:
+            if kind == 'pdf':
+                data = _renderer.render_bytes(customer_info, company_info, items, total)
+            else:
+                data = EstimateTemplate.generate_html_bytes(customer_info, company_info, items, total)
+            with open(os.path.join(out_dir, output_name(estimate_id, filename, kind)), 'wb') as f:
+                f.write(data)
+            size += len(data)
+        return estimate_id, filename, time.perf_counter() - started, size, None
+    except Exception as e:
+        return estimate_id, filename, time.perf_counter() - started, size, str(e)
@@ -1,6 +1,19 @@
-from jinja2 import Template
+from jinja2 import ChoiceLoader, DictLoader, Environment, FileSystemBytecodeCache, FileSystemLoader, TemplateNotFound
 import datetime
+import io
 import os
+from metrics import timed
+
+# 기본 견적서 템플릿 이름 (get_html_template 문자열)
+DEFAULT_TEMPLATE = "estimate.html"
+# 템플릿 레이아웃이 바뀌면 올려서 이전에 생성한 문서와 구분
+TEMPLATE_VERSION = "1"
+# 고객사별 템플릿 폴더 ({고객사명}.html, 같은 이름의 estimate.html이 있으면 기본 템플릿 대체)
+TEMPLATE_DIR = os.environ.get("QUOTE_TEMPLATE_DIR", "templates")
+# 컴파일된 템플릿 바이트코드를 저장할 폴더 (비어 있으면 사용하지 않음)
+TEMPLATE_CACHE_DIR = os.environ.get("QUOTE_TEMPLATE_CACHE_DIR", "")
+
+_environment = None
 
 class EstimateTemplate:
     @staticmethod
@@ -151,26 +164,89 @@ class EstimateTemplate:
 """
 
     @staticmethod
-    def generate_html(customer_info, company_info, items, total):
-        template = Template(EstimateTemplate.get_html_template())
+    def template_for(customer_info):
+        """고객사 전용 템플릿이 있으면 그 이름을, 없으면 기본 템플릿 이름 반환"""
+        customer_name = ''.join(e for e in str(customer_info.get('고객사명', '')) if e.isalnum() or e.isspace()).strip()
+        if customer_name:
+            name = f"{customer_name}.html"
+            try:
+                get_environment().get_template(name)
+                return name
+            except TemplateNotFound:
+                pass
+        return DEFAULT_TEMPLATE
+
+    @staticmethod
+    def _context(customer_info, company_info, items, total):
+        """템플릿 렌더링 변수"""
         today = datetime.date.today().strftime("%Y년 %m월 %d일")
-        
+
         # 유효기간 설정 (작성일로부터 30일)
         validity_date = datetime.date.today() + datetime.timedelta(days=30)
         validity_period = validity_date.strftime("%Y년 %m월 %d일")
 
+        return {
+            'customer_info': customer_info,
+            'company_info': company_info,
+            'items': items,
+            'total': total,
+            'today': today,
+            'validity_period': validity_period
+        }
+
+    @staticmethod
+    def _template(customer_info, template_name):
+        """컴파일된 템플릿 조회 (template_name이 없으면 고객사별 템플릿 선택)"""
+        return get_environment().get_template(template_name or EstimateTemplate.template_for(customer_info))
+
+    @staticmethod
+    @timed("estimate_template.generate_html")
+    def generate_html(customer_info, company_info, items, total, template_name=None):
+        template = EstimateTemplate._template(customer_info, template_name)
+
         # HTML 생성
         html_content = template.render(
-            customer_info=customer_info,
-            company_info=company_info,
-            items=items,
-            total=total,
-            today=today,
-            validity_period=validity_period
+            **EstimateTemplate._context(customer_info, company_info, items, total)
         )
         
         return html_content
 
+    @staticmethod
+    @timed("estimate_template.stream_html")
+    def stream_html(fp, customer_info, company_info, items, total, template_name=None, encoding='utf-8'):
+        """HTML 견적서를 조각 단위로 fp에 바로 기록 (전체 문자열을 메모리에 만들지 않음)
+
+        fp는 바이너리 파일/소켓 스트림이며, 텍스트 스트림이면 encoding=None으로 호출합니다.
+        """
+        template = EstimateTemplate._template(customer_info, template_name)
+        template.stream(
+            **EstimateTemplate._context(customer_info, company_info, items, total)
+        ).dump(fp, encoding=encoding)
+        return fp
+
+    @staticmethod
+    def generate_html_bytes(customer_info, company_info, items, total, template_name=None):
+        """HTML 견적서를 파일 저장 없이 UTF-8 bytes로 생성"""
+        return EstimateTemplate.generate_html_stream(customer_info, company_info, items, total, template_name).getvalue()
+
+    @staticmethod
+    def generate_html_stream(customer_info, company_info, items, total, template_name=None):
+        """HTML 견적서를 파일 저장 없이 BytesIO로 생성"""
+        stream = EstimateTemplate.stream_html(io.BytesIO(), customer_info, company_info, items, total, template_name)
+        stream.seek(0)
+        return stream
+
+    @staticmethod
+    def save_html_stream(customer_info, company_info, items, total, filename, doc_folder, template_name=None):
+        """HTML 견적서를 문자열로 만들지 않고 파일에 바로 저장"""
+        os.makedirs(doc_folder, exist_ok=True)
+        file_path = os.path.join(doc_folder, f"{filename}.html")
+
+        with open(file_path, 'wb') as f:
+            EstimateTemplate.stream_html(f, customer_info, company_info, items, total, template_name)
+
+        return file_path
+
     @staticmethod
     def save_html(html_content, filename, doc_folder):
         """HTML 파일 저장"""
@@ -180,4 +256,37 @@ class EstimateTemplate:
         with open(file_path, 'w', encoding='utf-8') as f:
             f.write(html_content)
             
-        return file_path 
\ No newline at end of file
+        return file_path 
+
+
+def configure_templates(template_dir=None, bytecode_cache_dir=None):
+    """템플릿 환경 (재)설정
+
+    템플릿은 환경의 캐시에 컴파일된 상태로 보관되며, 파일 템플릿은 수정되면 다시 컴파일됩니다.
+    bytecode_cache_dir를 지정하면 컴파일 결과를 디스크에 저장해 프로세스 재시작 후에도 재사용합니다.
+    """
+    global _environment
+    template_dir = template_dir or TEMPLATE_DIR
+    bytecode_cache = None
+    if bytecode_cache_dir:
+        os.makedirs(bytecode_cache_dir, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(bytecode_cache_dir)
+
+    environment = Environment(
+        loader=ChoiceLoader([
+            FileSystemLoader(template_dir, encoding='utf-8'),
+            DictLoader({DEFAULT_TEMPLATE: EstimateTemplate.get_html_template()}),
+        ]),
+        bytecode_cache=bytecode_cache,
+        auto_reload=True,
+    )
+    _environment = environment
+    return environment
+
+
+def get_environment():
+    """프로세스 공유 템플릿 환경 (처음 사용할 때 생성)"""
+    # 동시에 처음 호출되어 두 번 생성되더라도 마지막 환경 하나만 남으므로 잠금은 필요 없음
+    if _environment is None:
+        configure_templates(bytecode_cache_dir=TEMPLATE_CACHE_DIR or None)
+    return _environment
@@ -0,0 +1,282 @@
+# 견적서_이력 폴더의 CSV 견적서(Estimate_App.py / Quote_Reload_App.py / DataManager.save_estimate_csv 형식)를
+# quotation.db로 가져오는 명령
+#
+# 사용법: python legacy_importer.py [--folder 견적서_이력] [--db quotation.db] [--workers 4]
+
+import argparse
+import os
+import re
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from data_manager import CUSTOMER_FIELDS, COMPANY_FIELDS
+from database import Database
+
+VERSION_PATTERN = re.compile(r'^(v(\d+)|final)$', re.IGNORECASE)
+FINAL_ORDER = 1_000_000
+DATE_PATTERNS = [
+    (re.compile(r'^\((\d{4}-\d{2}-\d{2})\)'), "%Y-%m-%d"),  # (YYYY-MM-DD)고객사명_건명_버전
+    (re.compile(r'^(\d{8})_'), "%Y%m%d"),                  # YYYYMMDD_고객사명_프로젝트명_버전
+]
+
+
+def split_version(stem):
+    """파일명(확장자 제외)을 (기본 파일명, 버전, 버전 순서 목록)으로 분리
+
+    불러오기 화면은 불러온 파일명을 그대로 기본 파일명으로 쓰므로 다시 저장한 견적서는
+    X_v1_v2.csv, X_v1_v2_final.csv처럼 버전이 이어 붙습니다. 끝의 버전을 모두 떼어 체인을 묶고
+    버전은 마지막 버전을 사용합니다.
+    """
+    base = stem
+    orders = []
+    while True:
+        head, sep, suffix = base.rpartition('_')
+        match = VERSION_PATTERN.match(suffix) if head else None
+        if not match:
+            break
+        # final은 항상 체인의 마지막
+        orders.append(int(match.group(2)) if match.group(2) else FINAL_ORDER)
+        base = head
+    if not orders:
+        return stem, 'v1', (1,)
+    orders = tuple(reversed(orders))
+    version = 'final' if orders[-1] == FINAL_ORDER else f"v{orders[-1]}"
+    return base, version, orders
+
+
+def version_sort_key(orders):
+    """체인 안 정렬 기준: 마지막 버전, 같으면 이어 붙은 버전 순서"""
+    return orders[-1], orders
+
+
+def _text(value):
+    """CSV 셀 값을 문자열로 변환 (빈 셀은 '')"""
+    if value is None or pd.isna(value):
+        return ''
+    return str(value).strip()
+
+
+def _number(value):
+    """'3,200,000' 같은 가격 문자열/숫자를 int로 변환 (빈 셀은 None, 변환할 수 없으면 ValueError)"""
+    if value is None or pd.isna(value) or not str(value).strip():
+        return None
+    text = str(value).replace(',', '').replace('₩', '').replace('원', '').strip()
+    try:
+        return int(float(text))
+    except ValueError:
+        raise ValueError(f"숫자로 변환할 수 없는 값: {value!r}")
+
+
+def _item_number(row, column, line):
+    """항목 행의 수량/단가 (비어 있거나 잘못된 값이면 무료 항목으로 가져오지 않도록 ValueError)"""
+    try:
+        number = _number(row.get(column))
+    except ValueError as e:
+        raise ValueError(f"{line}행 {_text(row['항목코드'])} {column}: {str(e)}")
+    if number is None:
+        raise ValueError(f"{line}행 {_text(row['항목코드'])} {column} 값이 비어 있습니다.")
+    return number
+
+
+def _estimate_date(meta_row, stem, path):
+    """견적일자: 메타 컬럼 → 파일명 날짜 → 파일 수정일 순으로 결정"""
+    value = _text(meta_row.get('견적일자'))
+    if value:
+        return value[:10]
+    for pattern, date_format in DATE_PATTERNS:
+        match = pattern.match(stem)
+        if match:
+            try:
+                return time.strftime("%Y-%m-%d", time.strptime(match.group(1), date_format))
+            except ValueError:
+                pass
+    return time.strftime("%Y-%m-%d", time.localtime(os.path.getmtime(path)))
+
+
+def parse_legacy_csv(path):
+    """CSV 견적서 한 개를 Database.save_estimates_bulk 레코드로 변환
+
+    메타 컬럼은 첫 행에, 항목 컬럼은 항목코드가 있는 행에 있다는 점은
+    불러오기 화면(Quote_Reload_App.py)과 같은 방식으로 해석합니다.
+    """
+    # 전화번호 앞자리 0 등이 숫자로 바뀌지 않도록 모든 값을 문자열로 읽음
+    df = pd.read_csv(path, encoding="utf-8-sig", dtype=str)
+    df.columns = df.columns.str.strip()
+    stem = os.path.splitext(os.path.basename(path))[0]
+    base_name, version, orders = split_version(stem)
+
+    meta_row = df.iloc[0] if len(df) else pd.Series(dtype=object)
+    customer_info = {field: _text(meta_row.get(field)) for field in CUSTOMER_FIELDS}
+    # Estimate_App.py는 건명과 별도로 프로젝트명을 저장함
+    if not customer_info['건명']:
+        customer_info['건명'] = _text(meta_row.get('프로젝트명'))
+    customer_info['견적일자'] = _estimate_date(meta_row, stem, path)
+    company_info = {field: _text(meta_row.get(field)) for field in COMPANY_FIELDS}
+
+    items = []
+    if '항목코드' in df.columns:
+        for index, row in df[df['항목코드'].notnull()].iterrows():
+            line = index + 2  # 헤더 다음 줄부터 1행
+            quantity = _item_number(row, '수량', line)
+            unit_price = _item_number(row, '단가', line)
+            # Estimate_App.py의 금액 컬럼은 문자열 단가로 계산되어 신뢰할 수 없으므로 다시 계산
+            items.append({
+                '항목코드': _text(row['항목코드']),
+                '품목명': _text(row.get('품목명')),
+                '단위': _text(row.get('단위')),
+                '수량': quantity,
+                '단가': unit_price,
+                '금액': quantity * unit_price
+            })
+
+    try:
+        total_amount = _number(meta_row.get('총금액'))
+    except ValueError as e:
+        raise ValueError(f"총금액: {str(e)}")
+    if total_amount is None:
+        total_amount = sum(item['금액'] for item in items)
+
+    return {
+        'customer_info': customer_info,
+        'company_info': company_info,
+        'items': items,
+        'total_amount': total_amount,
+        'filename': stem,
+        'is_final': version == 'final',
+        'source_file': os.path.basename(path),
+        'base_name': base_name,
+        'version': version,
+        'version_order': orders[-1]
+    }
+
+
+def _parse_safely(path):
+    """프로세스 풀 작업: 파싱 실패를 예외 대신 결과로 반환"""
+    try:
+        return parse_legacy_csv(path), None
+    except Exception as e:
+        return None, f"{os.path.basename(path)}: {str(e)}"
+
+
+class LegacyImporter:
+    def __init__(self, folder="견적서_이력", db=None, workers=None, batch_size=500):
+        self.folder = folder
+        self.db = db or Database()
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+
+    def _imported_files(self):
+        """이미 가져온 파일 목록"""
+        conn = self.db.get_connection()
+        return {row[0] for row in conn.execute("SELECT source_file FROM legacy_imports")}
+
+    def _latest_imported(self, base_names):
+        """기본 파일명별로 이미 가져온 마지막 버전의 estimate_id"""
+        conn = self.db.get_connection()
+        latest = {}
+        for base_name in base_names:
+            row = conn.execute("""
+                SELECT estimate_id FROM legacy_imports
+                WHERE base_name = ? ORDER BY version_order DESC, rowid DESC LIMIT 1
+            """, (base_name,)).fetchone()
+            if row:
+                latest[base_name] = row[0]
+        return latest
+
+    def scan(self):
+        """가져올 파일을 기본 파일명별 버전 순서로 묶어 반환 (이미 가져온 파일 제외)"""
+        imported = self._imported_files()
+        groups = defaultdict(list)
+        skipped = 0
+        for name in os.listdir(self.folder):
+            if not name.endswith(".csv"):
+                continue
+            if name in imported:
+                skipped += 1
+                continue
+            base_name, version, orders = split_version(os.path.splitext(name)[0])
+            groups[base_name].append((version_sort_key(orders), name))
+        for files in groups.values():
+            files.sort()
+        return groups, skipped
+
+    @staticmethod
+    def _record_import(cursor, record, estimate_id):
+        """가져오기 기록 (견적서 저장과 같은 트랜잭션)"""
+        cursor.execute("""
+            INSERT INTO legacy_imports (source_file, base_name, version, version_order, estimate_id)
+            VALUES (?, ?, ?, ?, ?)
+        """, (record['source_file'], record['base_name'], record['version'],
+              record['version_order'], estimate_id))
+
+    def run(self, progress=print):
+        """폴더 전체 가져오기 후 처리 통계 반환"""
+        started = time.perf_counter()
+        groups, skipped = self.scan()
+        parents = self._latest_imported(groups)
+        stats = {'files': sum(len(files) for files in groups.values()), 'imported': 0,
+                 'skipped': skipped, 'failed': 0, 'items': 0, 'errors': []}
+
+        # 버전 체인은 wave 단위로 저장: n번째 wave는 각 체인의 n번째 파일이며 직전 wave 결과를 부모로 사용
+        depth = max((len(files) for files in groups.values()), default=0)
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            for wave in range(depth):
+                paths = [os.path.join(self.folder, files[wave][1])
+                         for files in groups.values() if len(files) > wave]
+                chunksize = max(1, len(paths) // (self.workers * 4))
+                saved = []
+                records = self._records(pool.map(_parse_safely, paths, chunksize=chunksize),
+                                        parents, saved, stats)
+                result = self.db.save_estimates_bulk(records, batch_size=self.batch_size,
+                                                     on_saved=self._record_import)
+                # 이번 wave에서 저장된 견적서를 다음 wave의 부모로 등록
+                for (base_name, item_count), estimate_id in zip(saved, result['ids']):
+                    if estimate_id:
+                        parents[base_name] = estimate_id
+                        stats['imported'] += 1
+                        stats['items'] += item_count
+                for failure in result['failures']:
+                    stats['failed'] += 1
+                    stats['errors'].append(f"{failure['filename']}: {failure['error']}")
+                progress(f"wave {wave + 1}/{depth}: {len(paths)}개 파일 처리")
+
+        stats['elapsed'] = time.perf_counter() - started
+        stats['files_per_sec'] = stats['files'] / stats['elapsed'] if stats['elapsed'] else 0.0
+        return stats
+
+    @staticmethod
+    def _records(parsed, parents, saved, stats):
+        """파싱 결과를 저장 레코드로 변환하며 부모 ID 연결 (saved에 (기본 파일명, 항목 수) 기록)"""
+        for record, error in parsed:
+            if error:
+                stats['failed'] += 1
+                stats['errors'].append(error)
+                continue
+            record['parent_id'] = parents.get(record['base_name'])
+            saved.append((record['base_name'], len(record['items'])))
+            yield record
+
+
+def main():
+    parser = argparse.ArgumentParser(description="견적서_이력 CSV 견적서를 DB로 가져오기")
+    parser.add_argument("--folder", default="견적서_이력", help="CSV 견적서 폴더")
+    parser.add_argument("--db", default="quotation.db", help="SQLite DB 파일")
+    parser.add_argument("--workers", type=int, default=None, help="파싱 프로세스 수 (기본: CPU 수)")
+    parser.add_argument("--batch-size", type=int, default=500, help="커밋 단위 건수")
+    args = parser.parse_args()
+
+    importer = LegacyImporter(args.folder, Database(args.db), args.workers, args.batch_size)
+    stats = importer.run()
+
+    print(f"가져옴: {stats['imported']}건 (항목 {stats['items']}개), "
+          f"건너뜀: {stats['skipped']}건, 실패: {stats['failed']}건")
+    print(f"소요 시간: {stats['elapsed']:.2f}초, 처리량: {stats['files_per_sec']:.1f} 파일/초")
+    for error in stats['errors'][:20]:
+        print(f"  - {error}")
+
+
+if __name__ == "__main__":
+    main()
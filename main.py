@@ -6,14 +6,28 @@ from estimate_template import EstimateTemplate
 import datetime
 import webbrowser
 import os
-from database import Database
+import time
+from database import SEARCH_CANDIDATES, Database
+from metrics import RerunBreakdown, metrics
+from render_cache import get_render_cache, render_key
+from render_jobs import QUEUED, RUNNING, FAILED, RenderQueueFullError, get_render_jobs
+
+# 사이드바 견적 이력 한 페이지당 표시 건수
+HISTORY_PAGE_SIZE = 50
+
+# 생성한 PDF/HTML을 견적서 폴더에도 저장할지 여부 (읽기 전용 컨테이너에서는 QUOTE_SAVE_ARTIFACTS=0)
+SAVE_ARTIFACTS = os.environ.get("QUOTE_SAVE_ARTIFACTS", "1") != "0"
+
+# 견적서 생성 작업 상태 확인 간격(초)
+RENDER_POLL_INTERVAL = 0.5
 
 class MainApp:
     def __init__(self):
         st.set_page_config(page_title="AI 견적서 생성기", layout="wide")
         self.data_manager = DataManager()
-        self.estimate_handler = EstimateHandler()
-        self.df = self.data_manager.load_base_items()
+        self.estimate_handler = EstimateHandler(render_cache=get_render_cache())
+        self.catalog = self.data_manager.load_catalog()
+        self.df = self.catalog.df
         
     def format_history_item(self, item):
         """견적서 이력 항목 포맷팅"""
@@ -29,20 +43,55 @@ class MainApp:
     def render_sidebar(self):
         """사이드바 렌더링 - 견적서 이력 관리"""
         st.sidebar.subheader("📁 견적서 이력")
-        history = self.data_manager.get_estimate_history()
+        search = st.sidebar.text_input("견적서 검색 (고객사/건명/담당자/품목)", key="history_search").strip()
+        latest_only = st.sidebar.checkbox("최신본만 보기", key="history_latest_only")
+        
+        # 검색 조건이 바뀌면 첫 페이지부터 다시 조회
+        filters = (search, latest_only)
+        if st.session_state.get('history_filters') != filters:
+            st.session_state['history_filters'] = filters
+            st.session_state['history_page_cursors'] = [None]
+        page_cursors = st.session_state.setdefault('history_page_cursors', [None])
+        
+        if search:
+            # 검색어가 있으면 전문 검색 결과를 관련도순으로 한 페이지만 표시
+            found = self.data_manager.search_estimates(
+                search, limit=HISTORY_PAGE_SIZE, latest_only=latest_only)
+            history = found['items']
+            has_next = False
+            label = f"검색 결과 ({len(history)}건)"
+            if found['truncated']:
+                st.sidebar.caption(f"일치하는 견적서가 많아 최근 {SEARCH_CANDIDATES:,}건 중에서 찾았습니다. "
+                                   "검색어를 더 구체적으로 입력해 보세요.")
+        else:
+            # 다음 페이지 존재 여부 확인을 위해 한 건 더 조회
+            history = self.data_manager.get_estimate_history(
+                limit=HISTORY_PAGE_SIZE + 1,
+                after_cursor=page_cursors[-1],
+                latest_only=latest_only
+            )
+            has_next = len(history) > HISTORY_PAGE_SIZE
+            history = history[:HISTORY_PAGE_SIZE]
+            label = f"견적 이력 선택 ({len(page_cursors)} 페이지)"
         
         if history:
-            # 견적서 이력을 최신 순으로 정렬 (생성일자 기준)
-            formatted_history = sorted(history, 
-                key=lambda x: x['생성일자'], reverse=True)
-            
-            # 선택된 견적서 불러오기
+            # 선택된 견적서 불러오기 (이력은 생성일자 기준 최신순, 검색 결과는 관련도순)
             selected_estimate = st.sidebar.selectbox(
-                "견적 이력 선택",
-                formatted_history,
+                label,
+                history,
                 format_func=self.format_history_item
             )
             
+            prev_col, next_col = st.sidebar.columns(2)
+            with prev_col:
+                if st.button("◀ 이전", disabled=len(page_cursors) == 1):
+                    page_cursors.pop()
+                    st.rerun()
+            with next_col:
+                if st.button("다음 ▶", disabled=not has_next):
+                    page_cursors.append(Database.history_cursor(history[-1]))
+                    st.rerun()
+            
             col1, col2 = st.sidebar.columns(2)
             with col1:
                 if st.button("📂 견적 불러오기"):
@@ -55,7 +104,7 @@ class MainApp:
                     self.clear_session_state()
                     st.rerun()
         else:
-            st.sidebar.info("저장된 견적 이력이 없습니다.")
+            st.sidebar.info("검색 결과가 없습니다." if search else "저장된 견적 이력이 없습니다.")
             if st.sidebar.button("🔄 초기화"):
                 self.clear_session_state()
                 st.rerun()
@@ -84,6 +133,7 @@ class MainApp:
             'company_phone': '',
             'special_notes': '',
             'loaded_items': [],
+            'loaded_quantities': {},
             'current_estimate_id': None,
             'is_final': False
         })
@@ -179,21 +229,18 @@ class MainApp:
         """견적 항목 선택 섹션"""
         st.subheader("1️⃣ 견적 항목 선택")
         selected_quantities = {}
+        # 불러온 견적서의 항목코드 → 수량 (load_estimate_to_session에서 한 번만 생성)
+        loaded_quantities = st.session_state.get('loaded_quantities', {})
         
-        for cat in self.df['분류'].unique():
+        for cat, sub_df in self.catalog.by_category.items():
             with st.expander(f"📂 {cat} 항목 보기"):
-                sub_df = self.df[self.df['분류'] == cat].reset_index(drop=True)
                 for i, row in sub_df.iterrows():
                     col1, col2 = st.columns([3, 1])
                     with col1:
                         st.markdown(f"**[{row['항목코드']}] {row['품목명']}**")
                         st.markdown(f"{row['설명']}")
                     with col2:
-                        default_qty = 0
-                        if 'loaded_items' in st.session_state:
-                            for item in st.session_state['loaded_items']:
-                                if item['항목코드'] == row['항목코드']:
-                                    default_qty = item['수량']
+                        default_qty = loaded_quantities.get(row['항목코드'], 0)
                         qty = st.number_input(
                             f"수량 ({row['단위']}) - {row['항목코드']}", 
                             min_value=0, 
@@ -207,45 +254,14 @@ class MainApp:
 
     def generate_filename(self, customer_info, version):
         """견적서 파일명 생성"""
-        # 견적일자 가져오기
-        estimate_date = customer_info['견적일자']
-        if isinstance(estimate_date, str):
-            try:
-                estimate_date = datetime.datetime.strptime(estimate_date, "%Y-%m-%d").date()
-            except ValueError:
-                estimate_date = datetime.date.today()
-        elif not isinstance(estimate_date, datetime.date):
-            estimate_date = datetime.date.today()
-            
-        # 날짜 형식 변환 (YYYY-MM-DD)
-        date_str = estimate_date.strftime("(%Y-%m-%d)")
-        
-        # 고객사명과 건명 가져오기 (특수문자 제거)
-        company_name = ''.join(e for e in customer_info['고객사명'] if e.isalnum() or e.isspace())
-        project_name = ''.join(e for e in customer_info['건명'] if e.isalnum() or e.isspace())
-        
-        # 공백 제거 및 기본값 설정
-        company_name = company_name.strip()
-        project_name = project_name.strip()
-        
-        if not company_name:
-            company_name = "NoCompany"
-        if not project_name:
-            project_name = "NoProject"
-            
-        # 건명은 앞 4자리만 사용
-        project_name = project_name[:4]
-            
-        # 파일명 구성: (YYYY-MM-DD)고객사명_건명4자_버전
-        return f"{date_str}{company_name}_{project_name}_{version}"
+        return DataManager.generate_filename(customer_info, version)
 
-    def render_results(self, selected_items, customer_info, company_info):
-        """견적 결과 및 저장 섹션"""
+    def render_results(self, selected_items, total, customer_info, company_info):
+        """견적 결과 및 저장 섹션 (total은 price_selected_items가 함께 계산한 총액)"""
         if not selected_items:
             return
             
         st.subheader("2️⃣ 견적 결과")
-        total = self.estimate_handler.calculate_total(selected_items)
         
         # 견적 테이블 표시
         result_df = pd.DataFrame(selected_items)
@@ -331,59 +347,126 @@ class MainApp:
                 except Exception as e:
                     st.error(f"견적서 저장 중 오류가 발생했습니다: {str(e)}")
 
-        # HTML 견적서 생성
+        # HTML/PDF 견적서 생성 (백그라운드 작업으로 등록 후 완료되면 다운로드)
         with col2:
             if st.button("📄 견적서 HTML 생성"):
-                html_content = EstimateTemplate.generate_html(
-                    customer_info,
-                    company_info,
-                    selected_items,
-                    total
-                )
-                html_path = EstimateTemplate.save_html(html_content, filename, self.data_manager.doc_folder)
-                webbrowser.open(f'file://{os.path.abspath(html_path)}')
-                st.success(f"✅ 견적서 HTML 생성 완료: {html_path}")
+                self.submit_render_job('html', customer_info, company_info, selected_items, total)
+            html_pending = self.render_job_status('html', filename, customer_info, company_info, selected_items, total)
 
-        # PDF 생성
         with col3:
             if st.button("📄 견적서 PDF 다운로드"):
-                pdf_path = self.estimate_handler.generate_pdf(
-                    filename, 
-                    customer_info, 
-                    company_info, 
-                    selected_items, 
-                    total
-                )
-                with open(pdf_path, "rb") as f:
-                    st.download_button(
-                        label="📥 PDF 다운로드",
-                        data=f,
-                        file_name=f"{filename}.pdf",
-                        mime="application/pdf"
-                    )
+                self.submit_render_job('pdf', customer_info, company_info, selected_items, total)
+            pdf_pending = self.render_job_status('pdf', filename, customer_info, company_info, selected_items, total)
+
+        # 렌더링 캐시 통계
+        cache_stats = get_render_cache().stats()
+        if cache_stats['hits'] or cache_stats['misses']:
+            st.caption(
+                f"문서 캐시 적중률 {cache_stats['hit_rate']:.0%} "
+                f"(적중 {cache_stats['hits']}회, 절약 {cache_stats['bytes_saved'] / 1024:,.0f}KB)"
+            )
+
+        # 생성 중인 작업이 있으면 잠시 후 다시 실행해 상태 갱신
+        if html_pending or pdf_pending:
+            time.sleep(RENDER_POLL_INTERVAL)
+            st.rerun()
+
+    def submit_render_job(self, kind, customer_info, company_info, selected_items, total):
+        """견적서 생성 작업 등록 (작업 ID는 세션에 보관)"""
+        try:
+            job_id = get_render_jobs().submit(kind, customer_info, company_info, selected_items, total)
+        except RenderQueueFullError as e:
+            st.warning(f"{str(e)} 잠시 후 다시 시도해주세요.")
+            return
+        except Exception as e:
+            st.error(f"견적서 생성 작업을 등록하지 못했습니다: {str(e)}")
+            return
+        st.session_state.setdefault('render_jobs', {})[kind] = {'job_id': job_id, 'saved': False}
+
+    def render_job_status(self, kind, filename, customer_info, company_info, selected_items, total):
+        """견적서 생성 작업 상태 표시, 아직 처리 중이면 True 반환"""
+        entry = st.session_state.get('render_jobs', {}).get(kind)
+        if not entry:
+            return False
+        job = get_render_jobs().get(entry['job_id'])
+        # 만료되었거나 작업 후 견적 내용이 바뀐 경우 이전 결과는 표시하지 않음
+        if job is None or job.key != render_key(kind, customer_info, company_info, selected_items, total):
+            del st.session_state['render_jobs'][kind]
+            return False
+
+        label = "HTML" if kind == 'html' else "PDF"
+        status = job.status
+        if status in (QUEUED, RUNNING):
+            st.info(f"⏳ 견적서 {label} {'대기' if status == QUEUED else '생성'} 중...")
+            return True
+        if status == FAILED:
+            st.error(f"견적서 {label} 생성 중 오류가 발생했습니다: {job.error}")
+            return False
+
+        data = job.result()
+        if SAVE_ARTIFACTS and not entry['saved']:
+            entry['saved'] = True
+            if kind == 'html':
+                html_path = EstimateTemplate.save_html(data.decode('utf-8'), filename, self.data_manager.doc_folder)
+                webbrowser.open(f'file://{os.path.abspath(html_path)}')
+                st.success(f"✅ 견적서 HTML 생성 완료: {html_path}")
+            else:
+                self.estimate_handler.save_pdf(data, filename)
+        st.download_button(
+            label=f"📥 {label} 다운로드",
+            data=data,
+            file_name=f"{filename}.{kind}",
+            mime="text/html" if kind == 'html' else "application/pdf",
+            key=f"download_{kind}"
+        )
+        return False
 
     def load_estimate_to_session(self, estimate_data, items_data):
         """불러온 견적서 데이터를 세션에 저장"""
         st.session_state['loaded_items'] = items_data
+        st.session_state['loaded_quantities'] = {item['항목코드']: item['수량'] for item in items_data}
         st.session_state['current_estimate_id'] = estimate_data.get('estimate_id')
         st.session_state['is_final'] = estimate_data.get('is_final', False)
         
         # 고객 정보와 회사 정보를 세션에 저장
         for key, value in estimate_data.items():
-            if key not in ['estimate_id', 'is_final']:
+            if key not in ['estimate_id', 'is_final', '총금액']:
                 st.session_state[key] = value
 
     def run(self):
         """메인 애플리케이션 실행"""
         st.title("📄 견적서 생성 및 이력 관리")
         
-        self.render_sidebar()
-        customer_info = self.render_customer_info()
-        company_info = self.render_company_info()
-        selected_quantities = self.render_item_selection()
+        # 구간 시간은 section이 지표에 기록하므로 st.rerun() 등으로 중간에 끝난 실행은 표시를 건너뜀
+        breakdown = RerunBreakdown()
+        with breakdown.section("sidebar"):
+            self.render_sidebar()
+        with breakdown.section("customer_info"):
+            customer_info = self.render_customer_info()
+        with breakdown.section("company_info"):
+            company_info = self.render_company_info()
+        with breakdown.section("item_selection"):
+            selected_quantities = self.render_item_selection()
         
-        selected_items = self.estimate_handler.process_selected_items(self.df, selected_quantities)
-        self.render_results(selected_items, customer_info, company_info)
+        with breakdown.section("pricing"):
+            selected_items, total = self.estimate_handler.price_selected_items(self.catalog, selected_quantities)
+        with breakdown.section("results"):
+            self.render_results(selected_items, total, customer_info, company_info)
+        self.render_timings(breakdown)
+
+    def render_timings(self, breakdown):
+        """이번 실행의 구간별 소요 시간 및 누적 지표 내보내기"""
+        with st.sidebar.expander("⏱ 실행 시간", expanded=False):
+            st.caption(f"이번 실행: {breakdown.total() * 1000:,.1f}ms")
+            st.table(pd.DataFrame(
+                [{"구간": name, "ms": round(seconds * 1000, 1)} for name, seconds in breakdown.sections]
+            ))
+            # 누적 지표 직렬화는 내보내기를 켠 경우에만 (rerun마다 전체 지표를 만들지 않도록)
+            if st.checkbox("누적 지표 내보내기", key="metrics_export"):
+                st.download_button("지표 JSON", data=metrics.to_json(), file_name="metrics.json",
+                                   mime="application/json", key="metrics_json")
+                st.download_button("지표 Prometheus", data=metrics.prometheus_text(), file_name="metrics.prom",
+                                   mime="text/plain", key="metrics_prom")
 
 if __name__ == "__main__":
     app = MainApp()
@@ -0,0 +1,185 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# 지연 시간 히스토그램 구간 (초, Prometheus 관례)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS_ENABLED = os.environ.get("QUOTE_METRICS", "1") != "0"
+
+
+class _Series:
+    """작업 하나의 호출 횟수/지연 시간 히스토그램/행 수"""
+    __slots__ = ('count', 'errors', 'total', 'max', 'buckets', 'rows', 'row_calls')
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)  # 마지막은 +Inf
+        self.rows = 0
+        self.row_calls = 0
+
+
+class MetricsRegistry:
+    """프로세스 단위 작업 지표 저장소
+
+    기록은 perf_counter 두 번과 잠금 한 번이면 끝나므로 운영 환경에서 켜 두어도 됩니다.
+    """
+    def __init__(self, enabled=METRICS_ENABLED):
+        self.enabled = enabled
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def _get(self, name):
+        series = self._series.get(name)
+        if series is None:
+            series = self._series.setdefault(name, _Series())
+        return series
+
+    def observe(self, name, seconds, rows=None, error=False):
+        """작업 한 번의 소요 시간(초)과 처리 행 수 기록"""
+        if not self.enabled:
+            return
+        index = len(BUCKETS)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                index = i
+                break
+        with self._lock:
+            series = self._get(name)
+            series.count += 1
+            series.total += seconds
+            series.buckets[index] += 1
+            if seconds > series.max:
+                series.max = seconds
+            if error:
+                series.errors += 1
+            if rows is not None:
+                series.rows += rows
+                series.row_calls += 1
+
+    @contextmanager
+    def timer(self, name):
+        """with 블록 소요 시간 기록 (yield한 dict에 'rows'를 넣으면 행 수도 기록)"""
+        context = {}
+        started = time.perf_counter()
+        try:
+            yield context
+        except BaseException:
+            self.observe(name, time.perf_counter() - started, context.get('rows'), error=True)
+            raise
+        self.observe(name, time.perf_counter() - started, context.get('rows'))
+
+    def timed(self, name, rows=None):
+        """함수 소요 시간을 기록하는 데코레이터 (rows(result)로 처리 행 수 계산)"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                started = time.perf_counter()
+                try:
+                    result = func(*args, **kwargs)
+                except BaseException:
+                    self.observe(name, time.perf_counter() - started, error=True)
+                    raise
+                row_count = None
+                if rows is not None:
+                    try:
+                        row_count = rows(result)
+                    except Exception:
+                        row_count = None
+                self.observe(name, time.perf_counter() - started, row_count)
+                return result
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        """현재 지표 JSON 직렬화용 dict"""
+        with self._lock:
+            operations = {}
+            for name, series in sorted(self._series.items()):
+                cumulative = 0
+                buckets = {}
+                for bound, count in zip(list(BUCKETS) + ['+Inf'], series.buckets):
+                    cumulative += count
+                    buckets[str(bound)] = cumulative
+                operations[name] = {
+                    'count': series.count,
+                    'errors': series.errors,
+                    'total_seconds': series.total,
+                    'mean_ms': series.total / series.count * 1000 if series.count else 0.0,
+                    'max_ms': series.max * 1000,
+                    'buckets': buckets,
+                    'rows': series.rows,
+                    'rows_per_call': series.rows / series.row_calls if series.row_calls else None,
+                }
+            return {'timestamp': time.time(), 'operations': operations}
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+
+    def prometheus_text(self):
+        """Prometheus 텍스트 형식(0.0.4) 출력"""
+        snapshot = self.snapshot()['operations']
+        lines = [
+            "# HELP quote_operation_duration_seconds 견적 시스템 작업 소요 시간",
+            "# TYPE quote_operation_duration_seconds histogram",
+        ]
+        for name, stats in snapshot.items():
+            label = name.replace('\\', '\\\\').replace('"', '\\"')
+            for bound, count in stats['buckets'].items():
+                lines.append(f'quote_operation_duration_seconds_bucket{{operation="{label}",le="{bound}"}} {count}')
+            lines.append(f'quote_operation_duration_seconds_sum{{operation="{label}"}} {stats["total_seconds"]:.6f}')
+            lines.append(f'quote_operation_duration_seconds_count{{operation="{label}"}} {stats["count"]}')
+        lines += [
+            "# HELP quote_operation_errors_total 예외로 끝난 작업 수",
+            "# TYPE quote_operation_errors_total counter",
+        ]
+        for name, stats in snapshot.items():
+            label = name.replace('\\', '\\\\').replace('"', '\\"')
+            lines.append(f'quote_operation_errors_total{{operation="{label}"}} {stats["errors"]}')
+        lines += [
+            "# HELP quote_operation_rows_total 작업이 처리/반환한 행 수",
+            "# TYPE quote_operation_rows_total counter",
+        ]
+        for name, stats in snapshot.items():
+            if stats['rows_per_call'] is None:
+                continue
+            label = name.replace('\\', '\\\\').replace('"', '\\"')
+            lines.append(f'quote_operation_rows_total{{operation="{label}"}} {stats["rows"]}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+class RerunBreakdown:
+    """Streamlit rerun 한 번의 구간별 소요 시간 (전체 지표에도 main.<구간>으로 기록)"""
+    def __init__(self, registry=None):
+        self.registry = registry or metrics
+        self.sections = []  # (구간 이름, 초)
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def section(self, name):
+        started = time.perf_counter()
+        try:
+            with self.registry.timer(f"main.{name}"):
+                yield
+        finally:
+            self.sections.append((name, time.perf_counter() - started))
+
+    def total(self):
+        return time.perf_counter() - self.started
+
+
+metrics = MetricsRegistry()
+timed = metrics.timed
+timer = metrics.timer
@@ -0,0 +1,360 @@
+import json
+import os
+import threading
+
+from contacts import CUSTOMER_CONTACT_FIELDS, SALES_REP_FIELDS, contact_id, split_contact
+
+# 스키마 버전은 SQLite 파일의 PRAGMA user_version에 기록됩니다.
+# 마이그레이션은 추가만 하고 기존 항목은 수정하지 않습니다 (이미 적용된 DB가 있으므로).
+
+
+def _json_path(key):
+    """json.dumps로 저장된(ASCII 이스케이프된) 키에 대한 json_extract 경로"""
+    return "$." + json.dumps(key)
+
+
+def _json_field_sql(column, key):
+    """이스케이프된 키와 원문 키를 모두 지원하는 json_extract 식"""
+    return f"COALESCE(json_extract({column}, '{_json_path(key)}'), json_extract({column}, '$.{key}'))"
+
+
+def _add_column(cursor, table, column, declaration):
+    """컬럼이 없을 때만 추가"""
+    columns = [row[1] for row in cursor.execute(f"PRAGMA table_info({table})").fetchall()]
+    if column not in columns:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+
+
+def _create_base_tables(cursor):
+    """기본 테이블 생성 (기존 quotation.db에는 이미 존재할 수 있음)"""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS estimates (
+        estimate_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        root_id INTEGER,
+        parent_id INTEGER,
+        filename TEXT NOT NULL,
+        customer_info TEXT NOT NULL,
+        company_info TEXT NOT NULL,
+        total_amount REAL,
+        is_final BOOLEAN DEFAULT FALSE,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (parent_id) REFERENCES estimates(estimate_id),
+        FOREIGN KEY (root_id) REFERENCES estimates(estimate_id)
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS estimate_items (
+        item_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        estimate_id INTEGER NOT NULL,
+        item_code TEXT,
+        item_name TEXT,
+        unit TEXT,
+        quantity INTEGER,
+        unit_price REAL,
+        amount REAL,
+        FOREIGN KEY (estimate_id) REFERENCES estimates(estimate_id)
+    )
+    ''')
+
+
+def _add_core_indexes(cursor):
+    """버전 체인/이력 조회용 인덱스 추가"""
+    # 버전 번호 계산, 최신본 판정
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_estimates_root_created ON estimates(root_id, created_at)")
+    # final 버전 조회 (save_estimate)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_estimates_root_final ON estimates(root_id, is_final)")
+    # 이력 정렬 (최신순)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_estimates_created ON estimates(created_at, estimate_id)")
+    # 견적 항목 조회/삭제
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_estimate_items_estimate ON estimate_items(estimate_id)")
+
+
+def _promote_customer_fields(cursor):
+    """고객사명/건명/견적일자를 customer_info JSON에서 인덱스 컬럼으로 분리"""
+    _add_column(cursor, "estimates", "customer_name", "TEXT")
+    _add_column(cursor, "estimates", "subject", "TEXT")
+    _add_column(cursor, "estimates", "estimate_date", "TEXT")
+
+    # 기존 행 백필 (1회만 JSON 파싱)
+    cursor.execute(f"""
+        UPDATE estimates SET
+            customer_name = {_json_field_sql('customer_info', '고객사명')},
+            subject = {_json_field_sql('customer_info', '건명')},
+            estimate_date = {_json_field_sql('customer_info', '견적일자')}
+    """)
+
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_estimates_customer_name ON estimates(customer_name)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_estimates_subject ON estimates(subject)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_estimates_estimate_date ON estimates(estimate_date)")
+
+
+def _store_version_numbers(cursor):
+    """버전 번호/최신본 여부를 저장 컬럼으로 추가하고 기존 데이터 백필"""
+    _add_column(cursor, "estimates", "version_num", "INTEGER")
+    _add_column(cursor, "estimates", "is_latest", "BOOLEAN DEFAULT FALSE")
+
+    # 기존 체인의 버전 번호는 생성 순서로 한 번만 계산
+    cursor.execute("DROP TABLE IF EXISTS temp._version_backfill")
+    cursor.execute("""
+        CREATE TEMP TABLE _version_backfill AS
+        SELECT
+            estimate_id,
+            ROW_NUMBER() OVER (
+                PARTITION BY COALESCE(root_id, estimate_id) ORDER BY created_at, estimate_id
+            ) AS version_num,
+            ROW_NUMBER() OVER (
+                PARTITION BY COALESCE(root_id, estimate_id) ORDER BY created_at DESC, estimate_id DESC
+            ) = 1 AS is_latest
+        FROM estimates
+    """)
+    cursor.execute("CREATE UNIQUE INDEX temp._version_backfill_id ON _version_backfill(estimate_id)")
+    cursor.execute("""
+        UPDATE estimates SET
+            version_num = (SELECT b.version_num FROM _version_backfill b WHERE b.estimate_id = estimates.estimate_id),
+            is_latest = (SELECT b.is_latest FROM _version_backfill b WHERE b.estimate_id = estimates.estimate_id)
+    """)
+    cursor.execute("DROP TABLE temp._version_backfill")
+
+    # 다음 버전 번호 조회
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_estimates_root_version ON estimates(root_id, version_num)")
+    # 최신본/최종본만 보기 (부분 인덱스)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_estimates_latest_created
+        ON estimates(created_at, estimate_id) WHERE is_latest = 1 OR is_final = 1
+    """)
+
+
+def _create_legacy_imports(cursor):
+    """견적서_이력 CSV 가져오기 기록 테이블 (재실행 시 이미 가져온 파일 건너뛰기)"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS legacy_imports (
+            source_file TEXT PRIMARY KEY,
+            base_name TEXT NOT NULL,
+            version TEXT,
+            version_order INTEGER,
+            estimate_id INTEGER NOT NULL,
+            imported_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (estimate_id) REFERENCES estimates(estimate_id)
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_legacy_imports_base ON legacy_imports(base_name, version_order)")
+
+
+def _add_delta_storage(cursor):
+    """버전 변경분(델타) 저장용 컬럼/테이블 추가
+
+    delta_base_id가 있는 견적서는 customer_info/company_info에 바뀐 필드만 저장하고,
+    견적 항목은 estimate_items 대신 estimate_item_deltas에 부모 대비 변경분만 저장합니다.
+    delta_depth는 마지막 전체 저장본으로부터의 델타 단계 수입니다.
+    """
+    _add_column(cursor, "estimates", "delta_base_id", "INTEGER")
+    _add_column(cursor, "estimates", "delta_depth", "INTEGER DEFAULT 0")
+
+    # position: 새 항목 목록에서의 위치 (NULL이면 해당 항목코드 삭제)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS estimate_item_deltas (
+            delta_id INTEGER PRIMARY KEY,
+            estimate_id INTEGER NOT NULL,
+            item_code TEXT NOT NULL,
+            position INTEGER,
+            item_name TEXT,
+            unit TEXT,
+            quantity INTEGER,
+            unit_price REAL,
+            amount REAL,
+            FOREIGN KEY (estimate_id) REFERENCES estimates(estimate_id)
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_estimate_item_deltas_estimate ON estimate_item_deltas(estimate_id)")
+    # final 버전 덮어쓰기 전 해당 버전을 기준으로 한 델타 조회
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_estimates_delta_base
+        ON estimates(delta_base_id) WHERE delta_base_id IS NOT NULL
+    """)
+
+
+def _normalize_contacts(cursor):
+    """고객/견적담당자 연락처를 customers/sales_reps 테이블로 분리하고 기존 행 변환
+
+    estimates.customer_info/company_info에는 연락처를 뺀 나머지 필드만 남기고 ID로 참조합니다.
+    델타로 저장된 행은 변경된 필드만 있으므로 기준 버전부터 합친 값으로 연락처를 정합니다.
+    """
+    for table, id_column in (("customers", "customer_id"), ("sales_reps", "sales_rep_id")):
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                {id_column} INTEGER PRIMARY KEY,
+                content_hash TEXT NOT NULL UNIQUE,
+                info TEXT NOT NULL
+            )
+        """)
+    _add_column(cursor, "estimates", "customer_id", "INTEGER REFERENCES customers(customer_id)")
+    _add_column(cursor, "estimates", "sales_rep_id", "INTEGER REFERENCES sales_reps(sales_rep_id)")
+
+    # 다른 델타 행의 기준이 되는 행만 합친 정보를 보관 (기준 행은 항상 ID가 더 작음)
+    bases = {row[0] for row in cursor.execute(
+        "SELECT DISTINCT delta_base_id FROM estimates WHERE delta_base_id IS NOT NULL").fetchall()}
+    merged = {}
+    contacts = {}
+    last_id = 0
+    while True:
+        rows = cursor.execute("""
+            SELECT estimate_id, customer_info, company_info, delta_base_id FROM estimates
+            WHERE estimate_id > ? ORDER BY estimate_id LIMIT 5000
+        """, (last_id,)).fetchall()
+        if not rows:
+            break
+        updates = []
+        for estimate_id, customer_json, company_json, delta_base_id in rows:
+            customer_info = json.loads(customer_json)
+            company_info = json.loads(company_json)
+            if delta_base_id is not None:
+                base_customer, base_company = merged[delta_base_id]
+                full_customer = {**base_customer, **customer_info}
+                full_company = {**base_company, **company_info}
+            else:
+                full_customer, full_company = customer_info, company_info
+            if estimate_id in bases:
+                merged[estimate_id] = (full_customer, full_company)
+
+            customer_contact = split_contact(full_customer, CUSTOMER_CONTACT_FIELDS)[0]
+            sales_rep = split_contact(full_company, SALES_REP_FIELDS)[0]
+            updates.append((
+                json.dumps(split_contact(customer_info, CUSTOMER_CONTACT_FIELDS)[1]),
+                json.dumps(split_contact(company_info, SALES_REP_FIELDS)[1]),
+                contact_id(cursor, "customers", customer_contact, contacts),
+                contact_id(cursor, "sales_reps", sales_rep, contacts),
+                estimate_id
+            ))
+        cursor.executemany("""
+            UPDATE estimates SET customer_info = ?, company_info = ?, customer_id = ?, sales_rep_id = ?
+            WHERE estimate_id = ?
+        """, updates)
+        last_id = rows[-1][0]
+
+
+def _create_search_index(cursor):
+    """견적서 전문 검색용 FTS5 인덱스 생성 및 기존 행 백필
+
+    rowid는 estimate_id이며 고객사명/건명/담당자명/파일명/품목명·항목코드를 색인합니다.
+    접두어 검색을 빠르게 하기 위해 2, 3글자 접두어 인덱스를 함께 만듭니다.
+    """
+    cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS estimate_search USING fts5(
+            customer_name, subject, contacts, filename, items,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+    """)
+    cursor.execute("DELETE FROM estimate_search")
+    cursor.execute(f"""
+        INSERT INTO estimate_search (rowid, customer_name, subject, contacts, filename, items)
+        SELECT
+            e.estimate_id, e.customer_name, e.subject,
+            TRIM(COALESCE({_json_field_sql('c.info', '담당자명')}, '') || ' ' ||
+                 COALESCE({_json_field_sql('s.info', '견적담당자명')}, '')),
+            e.filename,
+            (SELECT group_concat(COALESCE(i.item_name, '') || ' ' || COALESCE(i.item_code, ''), ' ')
+             FROM estimate_items i WHERE i.estimate_id = e.estimate_id)
+        FROM estimates e
+        LEFT JOIN customers c ON c.customer_id = e.customer_id
+        LEFT JOIN sales_reps s ON s.sales_rep_id = e.sales_rep_id
+    """)
+
+    # 델타로 저장된 행은 estimate_items가 없으므로 기준 버전부터 항목을 따라가 채움
+    bases = {row[0] for row in cursor.execute(
+        "SELECT DISTINCT delta_base_id FROM estimates WHERE delta_base_id IS NOT NULL").fetchall()}
+    names = {}  # 기준 버전 ID → {항목코드: 품목명}
+    rows = cursor.execute("""
+        SELECT estimate_id, delta_base_id FROM estimates
+        WHERE delta_base_id IS NOT NULL ORDER BY estimate_id
+    """).fetchall()
+    for estimate_id, delta_base_id in rows:
+        if delta_base_id not in names:
+            names[delta_base_id] = {
+                code: name for code, name in cursor.execute(
+                    "SELECT item_code, item_name FROM estimate_items WHERE estimate_id = ? ORDER BY item_id",
+                    (delta_base_id,)).fetchall()
+            }
+        items = dict(names[delta_base_id])
+        for code, position, name in cursor.execute(
+                "SELECT item_code, position, item_name FROM estimate_item_deltas WHERE estimate_id = ? ORDER BY delta_id",
+                (estimate_id,)).fetchall():
+            if position is None:
+                items.pop(code, None)
+            else:
+                items[code] = name
+        if estimate_id in bases:
+            names[estimate_id] = items
+        cursor.execute("UPDATE estimate_search SET items = ? WHERE rowid = ?", (
+            ' '.join(f"{name or ''} {code or ''}" for code, name in items.items()), estimate_id))
+
+
+# (버전, 설명, 적용 함수) - 버전은 1부터 연속으로 증가해야 함
+MIGRATIONS = [
+    (1, "기본 테이블 생성", _create_base_tables),
+    (2, "estimates/estimate_items 인덱스 추가", _add_core_indexes),
+    (3, "고객사명/건명/견적일자 컬럼 분리 및 백필", _promote_customer_fields),
+    (4, "버전 번호/최신본 여부 컬럼 추가 및 백필", _store_version_numbers),
+    (5, "CSV 이력 가져오기 기록 테이블 추가", _create_legacy_imports),
+    (6, "버전 변경분(델타) 저장 컬럼/테이블 추가", _add_delta_storage),
+    (7, "고객/견적담당자 연락처 테이블 분리 및 기존 행 변환", _normalize_contacts),
+    (8, "견적서 전문 검색(FTS5) 인덱스 생성 및 백필", _create_search_index),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+_migrated = set()
+_migrated_lock = threading.Lock()
+
+
+def get_schema_version(conn):
+    """DB 파일의 현재 스키마 버전 조회"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def apply_migrations(conn):
+    """적용되지 않은 마이그레이션을 순서대로 실행하고 적용된 버전 목록 반환
+
+    각 마이그레이션은 user_version 갱신과 함께 하나의 트랜잭션으로 실행되므로
+    중간에 실패해도 이전 버전 상태가 유지됩니다.
+    """
+    applied = []
+    for version, description, migration in MIGRATIONS:
+        if version <= get_schema_version(conn):
+            continue
+
+        cursor = conn.cursor()
+        try:
+            # 쓰기 잠금을 먼저 잡아 다른 프로세스와 동시에 같은 마이그레이션을 실행하지 않도록 함
+            conn.execute("BEGIN IMMEDIATE")
+            if version <= get_schema_version(conn):
+                conn.rollback()
+                continue
+            migration(cursor)
+            cursor.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+            applied.append(version)
+        except Exception as e:
+            conn.rollback()
+            print(f"마이그레이션 {version} ({description}) 적용 중 오류 발생: {str(e)}")
+            raise e
+        finally:
+            cursor.close()
+    return applied
+
+
+def migrate(conn, db_file):
+    """프로세스당 한 번만 마이그레이션 실행"""
+    # 메모리 DB는 연결마다 별개의 DB이므로 매번 확인
+    key = db_file if db_file == ":memory:" else os.path.abspath(db_file)
+    if key in _migrated:
+        return []
+    with _migrated_lock:
+        if key in _migrated:
+            return []
+        applied = apply_migrations(conn)
+        if db_file != ":memory:":
+            _migrated.add(key)
+        return applied
@@ -0,0 +1,237 @@
+# JSONL 주문 피드로 견적서를 일괄 생성하는 명령
+#
+# 한 줄에 한 건: {"customer_info": {...}, "company_info": {...}, "quantities": {"HW-001": 2, ...},
+#                "is_final": false, "parent_id": null}
+# 사용법: python order_feed.py orders.jsonl [--db quotation.db] [--batch-size 500]
+#                             [--render pdf|html|both] [--out 견적서_이력] [--workers 4]
+#         (파일 대신 -를 주면 표준 입력에서 읽음)
+
+import argparse
+import datetime
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from catalog import load_catalog
+from data_manager import COMPANY_FIELDS, CUSTOMER_FIELDS, DataManager
+from database import Database
+from document_worker import FORMATS, init_worker, render_to_files
+from pdf_renderer import FONT_FILE
+from pricing import price_quote, quantities_from_codes
+
+PROGRESS_EVERY = 10000
+
+
+def parse_order(line, catalog):
+    """주문 한 줄을 save_estimate 인자 dict로 변환 (잘못된 주문은 ValueError)"""
+    try:
+        order = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"JSON 형식 오류: {str(e)}")
+    if not isinstance(order, dict) or not isinstance(order.get('quantities'), dict):
+        raise ValueError("quantities({항목코드: 수량})가 없습니다.")
+    for key in ('customer_info', 'company_info'):
+        info = order.get(key) or {}
+        if not isinstance(info, dict):
+            raise ValueError(f"{key}는 객체여야 합니다.")
+        for field, value in info.items():
+            if value is not None and not isinstance(value, str):
+                raise ValueError(f"{key}.{field} 값은 문자열이어야 합니다.")
+    customer = order.get('customer_info') or {}
+    for field in ('고객사명', '건명'):
+        if not (customer.get(field) or '').strip():
+            raise ValueError(f"customer_info.{field} 값이 없습니다.")
+    for code, qty in order['quantities'].items():
+        # JSON의 true/false/null, 소수, 문자열 수량은 거부 (int(None) 등의 TypeError 방지)
+        if isinstance(qty, bool) or not isinstance(qty, int):
+            raise ValueError(f"수량은 정수여야 합니다: {code}={json.dumps(qty, ensure_ascii=False)}")
+    parent_id = order.get('parent_id')
+    if parent_id is not None and (isinstance(parent_id, bool) or not isinstance(parent_id, int)):
+        raise ValueError("parent_id는 정수여야 합니다.")
+
+    customer_info = {field: '' for field in CUSTOMER_FIELDS}
+    customer_info.update({field: value for field, value in customer.items() if value is not None})
+    if not customer_info['견적일자']:
+        customer_info['견적일자'] = datetime.date.today().isoformat()
+    company_info = {field: '' for field in COMPANY_FIELDS}
+    company_info.update({field: value for field, value in (order.get('company_info') or {}).items()
+                         if value is not None})
+
+    items, total = price_quote(catalog, quantities_from_codes(catalog, order['quantities']))
+    if not items:
+        raise ValueError("수량이 있는 견적 항목이 없습니다.")
+    record = {
+        'customer_info': customer_info,
+        'company_info': company_info,
+        'items': items,
+        'total_amount': total,
+        'parent_id': parent_id,
+        'is_final': bool(order.get('is_final'))
+    }
+
+    def filename(version):
+        # 버전은 저장 트랜잭션에서 정해지므로 그때 만든 파일명으로 바꿔 두고 문서 생성에도 사용
+        record['filename'] = DataManager.generate_filename(customer_info, version)
+        return record['filename']
+
+    record['filename'] = filename
+    return record
+
+
+class OrderFeed:
+    """주문 피드 → 가격 계산 → 배치 저장 → (선택) 문서 생성 파이프라인
+
+    입력은 batch_size 줄씩만 읽고, 렌더링은 최대 두 배치만 동시에 진행하므로
+    피드 크기와 관계없이 메모리 사용량이 일정합니다.
+    """
+    def __init__(self, db, catalog, batch_size=500, kinds=None, out_dir="견적서_이력",
+                 workers=None, font_file=FONT_FILE):
+        self.db = db
+        self.catalog = catalog
+        self.batch_size = batch_size
+        self.kinds = kinds or []
+        self.out_dir = out_dir
+        self.workers = workers or os.cpu_count() or 1
+        self.font_file = font_file
+
+    def run(self, lines, progress=print):
+        """피드 전체 처리 후 통계 반환"""
+        stats = {'records': 0, 'saved': 0, 'rendered': 0, 'failed': 0, 'errors': []}
+        started = time.perf_counter()
+        pool = None
+        if self.kinds:
+            os.makedirs(self.out_dir, exist_ok=True)
+            pool = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker,
+                                       initargs=(self.font_file,))
+        pending = []
+        reported = 0
+        try:
+            numbered = enumerate(lines, 1)
+            while True:
+                chunk = list(itertools.islice(numbered, self.batch_size))
+                if not chunk:
+                    break
+                tasks = self._save_chunk(chunk, stats)
+                if pool and tasks:
+                    pending.append(pool.map(render_to_files, tasks,
+                                            chunksize=max(1, len(tasks) // (self.workers * 4))))
+                    if len(pending) > 1:
+                        self._collect(pending.pop(0), stats)
+                if stats['records'] - reported >= PROGRESS_EVERY:
+                    reported = stats['records']
+                    elapsed = time.perf_counter() - started
+                    progress(f"{stats['records']:,}건 처리, {stats['records'] / elapsed:,.0f} 건/초")
+            for results in pending:
+                self._collect(results, stats)
+        finally:
+            if pool:
+                pool.shutdown()
+
+        stats['elapsed'] = time.perf_counter() - started
+        stats['records_per_sec'] = stats['records'] / stats['elapsed'] if stats['elapsed'] else 0.0
+        return stats
+
+    def _save_chunk(self, chunk, stats):
+        """한 배치를 가격 계산 후 저장, 렌더링 작업 목록 반환
+
+        부모 견적서가 아직 없는 주문은 같은 배치의 앞선 주문이 부모일 수 있으므로 그때까지의 주문을
+        먼저 저장한 뒤 다시 확인합니다 (batch_size와 관계없이 같은 결과).
+        """
+        records = []
+        line_numbers = []
+        tasks = []
+        known_parents = set()
+        for line_number, line in chunk:
+            if not line.strip():
+                continue
+            stats['records'] += 1
+            try:
+                record = parse_order(line, self.catalog)
+            except ValueError as e:
+                self._fail(stats, f"{line_number}행: {str(e)}")
+                continue
+
+            parent_id = record['parent_id']
+            if parent_id is not None and parent_id not in known_parents:
+                if not self.db.get_estimate_version(parent_id) and records:
+                    tasks += self._save_records(records, line_numbers, stats)
+                    records, line_numbers = [], []
+                if not self.db.get_estimate_version(parent_id):
+                    self._fail(stats, f"{line_number}행: 견적서 {parent_id}를 찾을 수 없습니다.")
+                    continue
+                known_parents.add(parent_id)
+            records.append(record)
+            line_numbers.append(line_number)
+
+        if records:
+            tasks += self._save_records(records, line_numbers, stats)
+        return tasks
+
+    def _save_records(self, records, line_numbers, stats):
+        """주문들을 한 트랜잭션으로 저장, 렌더링 작업 목록 반환
+
+        파일명은 저장 트랜잭션에서 실제로 정해진 버전으로 생성되고, 파일명 생성 오류 등은
+        해당 주문만 실패로 기록됩니다.
+        """
+        result = self.db.save_estimates_bulk(records, batch_size=len(records))
+        for failure in result['failures']:
+            self._fail(stats, f"{line_numbers[failure['index']]}행: {failure['error']}")
+
+        tasks = []
+        for record, estimate_id in zip(records, result['ids']):
+            if not estimate_id:
+                continue
+            stats['saved'] += 1
+            if self.kinds:
+                tasks.append((estimate_id, record['filename'], self.kinds, record['customer_info'],
+                              record['company_info'], record['items'], record['total_amount'], self.out_dir))
+        return tasks
+
+    @staticmethod
+    def _fail(stats, message):
+        stats['failed'] += 1
+        # 오류 메시지는 앞부분만 보관 (피드 전체가 잘못된 경우에도 메모리 제한)
+        if len(stats['errors']) < 100:
+            stats['errors'].append(message)
+
+    @classmethod
+    def _collect(cls, results, stats):
+        for estimate_id, filename, elapsed, size, error in results:
+            if error:
+                cls._fail(stats, f"{filename} 문서 생성 실패: {error}")
+            else:
+                stats['rendered'] += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSONL 주문 피드로 견적서 일괄 생성")
+    parser.add_argument("feed", help="JSONL 주문 파일 (-: 표준 입력)")
+    parser.add_argument("--db", default="quotation.db", help="SQLite DB 파일")
+    parser.add_argument("--catalog", default="기초_견적항목_테이블.csv", help="기초 견적 항목 CSV")
+    parser.add_argument("--batch-size", type=int, default=500, help="커밋 단위 건수")
+    parser.add_argument("--render", choices=sorted(FORMATS), help="견적서 문서도 생성 (pdf/html/both)")
+    parser.add_argument("--out", default="견적서_이력", help="문서 저장 폴더")
+    parser.add_argument("--workers", type=int, default=None, help="렌더링 프로세스 수 (기본: CPU 수)")
+    parser.add_argument("--font", default=FONT_FILE, help="PDF 폰트(TTF) 파일")
+    args = parser.parse_args()
+
+    feed = OrderFeed(Database(args.db), load_catalog(args.catalog), args.batch_size,
+                     FORMATS[args.render] if args.render else None, args.out, args.workers, args.font)
+    if args.feed == "-":
+        stats = feed.run(sys.stdin)
+    else:
+        with open(args.feed, encoding="utf-8-sig") as f:
+            stats = feed.run(f)
+
+    print(f"처리: {stats['records']:,}건, 저장: {stats['saved']:,}건, "
+          f"문서: {stats['rendered']:,}건, 실패: {stats['failed']:,}건")
+    print(f"소요 시간: {stats['elapsed']:.2f}초, 처리량: {stats['records_per_sec']:,.1f} 건/초")
+    for error in stats['errors'][:20]:
+        print(f"  - {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+import datetime
+import os
+import pickle
+import re
+import threading
+
+from fpdf import FPDF
+from fpdf.ttfonts import TTFontFile
+
+# PDF 레이아웃이 바뀌면 올려서 이전에 생성한 문서와 구분
+RENDERER_VERSION = "1"
+
+FONT_FAMILY = "ArialUnicode"
+FONT_FILE = "arialuni.ttf"
+
+# 견적 항목 표 컬럼: (너비, 제목, 데이터 정렬)
+ITEM_COLUMNS = [
+    (10, "No", 'C'),
+    (30, "항목코드", 'C'),
+    (60, "품목명", 'L'),
+    (20, "단위", 'C'),
+    (20, "수량", 'R'),
+    (30, "단가", 'R'),
+    (30, "금액", 'R'),
+]
+
+_font_metrics = {}  # TTF 절대 경로 → (폰트 메트릭 dict, 메트릭 캐시 파일 경로)
+_font_metrics_lock = threading.Lock()
+
+
+def _load_font_metrics(font_file):
+    """유니코드 TTF 폰트 메트릭을 프로세스당 한 번만 로드
+
+    fpdf의 add_font(uni=True)와 같은 규칙으로 폰트 옆의 .pkl 메트릭 캐시를 사용하고,
+    없으면 TTF에서 직접 계산합니다.
+    """
+    ttffilename = os.path.abspath(font_file)
+    cached = _font_metrics.get(ttffilename)
+    if cached:
+        return cached
+
+    with _font_metrics_lock:
+        cached = _font_metrics.get(ttffilename)
+        if cached:
+            return cached
+
+        unifilename = os.path.splitext(ttffilename)[0] + '.pkl'
+        if os.path.exists(unifilename):
+            with open(unifilename, "rb") as f:
+                font_dict = pickle.load(f)
+        else:
+            if not os.path.exists(ttffilename):
+                raise RuntimeError(f"TTF Font file not found: {font_file}")
+            ttf = TTFontFile()
+            ttf.getMetrics(ttffilename)
+            font_dict = {
+                'name': re.sub('[ ()]', '', ttf.fullName),
+                'type': 'TTF',
+                'desc': {
+                    'Ascent': int(round(ttf.ascent, 0)),
+                    'Descent': int(round(ttf.descent, 0)),
+                    'CapHeight': int(round(ttf.capHeight, 0)),
+                    'Flags': ttf.flags,
+                    'FontBBox': "[%s %s %s %s]" % tuple(int(round(v, 0)) for v in ttf.bbox[:4]),
+                    'ItalicAngle': int(ttf.italicAngle),
+                    'StemV': int(round(ttf.stemV, 0)),
+                    'MissingWidth': int(round(ttf.defaultWidth, 0)),
+                },
+                'up': round(ttf.underlinePosition),
+                'ut': round(ttf.underlineThickness),
+                'originalsize': os.stat(ttffilename).st_size,
+                'cw': ttf.charWidths,
+            }
+            unifilename = None
+
+        cached = (font_dict, unifilename)
+        _font_metrics[ttffilename] = cached
+        return cached
+
+
+class GlyphSubset(list):
+    """문서에 쓰인 글자 코드 목록
+
+    fpdf는 subset을 list로 다루며 글자를 쓸 때마다 append하고, 출력 시 폰트 전체 코드
+    (Arial Unicode는 약 6만 5천 개)마다 `cid in subset`을 검사합니다. 포함 여부 검사를
+    set으로 처리해 이 비용이 문서 길이에 비례해 커지지 않도록 합니다.
+    """
+    def __init__(self, iterable=()):
+        super().__init__(iterable)
+        self._members = set(self)
+
+    def append(self, value):
+        super().append(value)
+        self._members.add(value)
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._members = set(self)
+
+    def __contains__(self, value):
+        return value in self._members
+
+
+class QuotationPDF(FPDF):
+    """공유 폰트 메트릭을 사용하는 FPDF"""
+
+    def add_cached_font(self, family, font_file):
+        """프로세스 캐시의 메트릭으로 유니코드 폰트 등록 (add_font(uni=True) 대체)
+
+        글리프 폭 테이블(cw)은 읽기 전용으로 문서 간에 공유하고, 사용한 글자 목록(subset)만
+        문서마다 새로 만들어 출력 시 이 문서에 쓰인 글리프만 포함되도록 합니다.
+        """
+        fontkey = family.lower()
+        if fontkey in self.fonts:
+            return
+        font_dict, unifilename = _load_font_metrics(font_file)
+        ttffilename = os.path.abspath(font_file)
+        self.fonts[fontkey] = {
+            'i': len(self.fonts) + 1, 'type': font_dict['type'],
+            'name': font_dict['name'], 'desc': font_dict['desc'],
+            'up': font_dict['up'], 'ut': font_dict['ut'],
+            'cw': font_dict['cw'],
+            'ttffile': ttffilename, 'fontkey': fontkey,
+            'subset': GlyphSubset(range(0, 57 if hasattr(self, 'str_alias_nb_pages') else 32)),
+            'unifilename': unifilename,
+        }
+        self.font_files[fontkey] = {'length1': font_dict['originalsize'],
+                                    'type': "TTF", 'ttffile': ttffilename}
+        self.font_files[font_file] = {'type': "TTF"}
+
+
+class PdfRenderer:
+    """견적서 PDF 생성기
+
+    폰트 메트릭은 프로세스 단위로 캐시되므로 여러 EstimateHandler/세션이 renderer를 만들어도
+    arialuni.pkl은 한 번만 읽습니다.
+    FPDF 객체(레이아웃)는 문서마다 새로 만듭니다. FPDF는 페이지 버퍼와 사용 글자 목록을 객체에
+    쌓기 때문에 재사용할 수 없고, 레이아웃은 PDF당 약 2ms(전체의 10% 미만)라 따로 캐시하지 않습니다.
+    생성 시간 대부분은 출력 단계의 폰트 subset/폭 테이블 작성입니다 (GlyphSubset 참고).
+    """
+    def __init__(self, font_file=FONT_FILE):
+        self.font_file = font_file
+
+    def render(self, customer_info, company_info, selected_items, total):
+        """견적서 PDF 문서 생성 (출력 전 FPDF 객체 반환)"""
+        pdf = QuotationPDF()
+        pdf.add_page()
+        pdf.add_cached_font(FONT_FAMILY, self.font_file)
+        pdf.set_font(FONT_FAMILY, size=12)
+
+        # 제목
+        pdf.cell(200, 10, txt="견적서", ln=True, align="C")
+        pdf.ln(10)
+
+        # 고객 정보
+        pdf.set_font(FONT_FAMILY, size=10)
+        pdf.cell(200, 10, txt=f"고객사: {customer_info['고객사명']} | 건명: {customer_info['건명']}", ln=True)
+        pdf.cell(200, 10, txt=f"담당자: {customer_info['담당자명']} ({customer_info['직위']}) / {customer_info['전화번호']} / {customer_info['이메일']}", ln=True)
+        pdf.cell(200, 10, txt=f"견적일자: {datetime.date.today()} | 납품기간: {customer_info['납품기간']} | 하자기간: {customer_info['하자기간']}", ln=True)
+
+        # 당사 정보
+        pdf.cell(200, 10, txt=f"견적담당자: {company_info['견적담당자명']} ({company_info['견적담당자직위']}) / {company_info['견적담당자전화번호']} / {company_info['견적담당자이메일']}", ln=True)
+        pdf.ln(10)
+
+        # 견적 항목 테이블 헤더
+        pdf.set_font(FONT_FAMILY, style='', size=10)
+        for width, title, _ in ITEM_COLUMNS:
+            pdf.cell(width, 8, txt=title, border=1, align='C')
+        pdf.ln()
+
+        # 견적 항목 데이터
+        for idx, item in enumerate(selected_items, 1):
+            values = (
+                str(idx),
+                item['항목코드'],
+                item['품목명'],
+                item['단위'],
+                str(item['수량']),
+                f"{item['단가']:,}",
+                f"{item['수량'] * item['단가']:,}",
+            )
+            for (width, _, align), value in zip(ITEM_COLUMNS, values):
+                pdf.cell(width, 8, txt=value, border=1, align=align)
+            pdf.ln()
+
+        # 총액
+        pdf.ln(10)
+        pdf.set_font(FONT_FAMILY, size=11)
+        pdf.cell(200, 10, txt=f"총 금액 (VAT 별도): {total:,.0f}₩", ln=True, align='R')
+
+        # 특이사항
+        pdf.ln(10)
+        pdf.set_font(FONT_FAMILY, size=10)
+        pdf.cell(200, 10, txt="특이사항:", ln=True)
+        pdf.ln(5)
+
+        # 기본 특이사항
+        pdf.cell(200, 8, txt=f"1. 납품기간: {customer_info['납품기간']}", ln=True)
+        pdf.cell(200, 8, txt=f"2. 하자보증: {customer_info['하자기간']}", ln=True)
+        pdf.cell(200, 8, txt="3. 부가세는 별도입니다.", ln=True)
+
+        # 추가 특이사항
+        if company_info.get('특이사항'):
+            for idx, line in enumerate(company_info['특이사항'].split('\n'), 4):
+                if line.strip():
+                    pdf.cell(200, 8, txt=f"{idx}. {line.strip()}", ln=True)
+
+        return pdf
+
+    def render_bytes(self, customer_info, company_info, selected_items, total):
+        """견적서 PDF를 파일 없이 bytes로 생성"""
+        pdf = self.render(customer_info, company_info, selected_items, total)
+        # fpdf 1.7은 PDF 데이터를 latin-1 문자열로 반환함
+        return pdf.output(dest='S').encode('latin-1')
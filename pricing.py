@@ -0,0 +1,69 @@
+import numpy as np
+
+
+def quantities_from_widgets(catalog, selected_quantities):
+    """qty_{분류}_{순번} 위젯 값을 카탈로그 행 순서의 수량 벡터로 변환"""
+    return np.fromiter(
+        (selected_quantities.get(key, 0) for key in catalog.widget_keys),
+        dtype=np.int64,
+        count=len(catalog.widget_keys)
+    )
+
+
+def quantities_from_codes(catalog, code_quantities):
+    """{항목코드: 수량}을 카탈로그 행 순서의 수량 벡터로 변환 (없는 항목코드/음수 수량은 ValueError)"""
+    quantities = np.zeros(len(catalog.df), dtype=np.int64)
+    unknown = []
+    negative = []
+    for code, qty in code_quantities.items():
+        position = catalog.position_by_code.get(code)
+        if position is None:
+            unknown.append(code)
+            continue
+        qty = int(qty)
+        if qty < 0:
+            negative.append(code)
+            continue
+        quantities[position] += qty
+    if unknown:
+        raise ValueError(f"기초 견적 항목에 없는 항목코드: {', '.join(map(str, unknown))}")
+    if negative:
+        raise ValueError(f"수량은 0 이상이어야 합니다: {', '.join(map(str, negative))}")
+    return quantities
+
+
+def price_quote(catalog, quantities, price_column='기본단가'):
+    """카탈로그 행 순서의 수량 벡터로 견적 항목과 총액을 한 번에 계산
+
+    반환되는 항목은 화면 표시 순서(분류별)이며 render_results, generate_pdf,
+    EstimateTemplate가 사용하는 항목코드/품목명/단위/수량/단가/금액 dict 형식입니다.
+    값은 DB/JSON 저장을 위해 numpy 타입이 아닌 Python int로 변환합니다.
+    """
+    quantities = np.asarray(quantities, dtype=np.int64)
+    prices = catalog.arrays[price_column].astype(np.int64, copy=False)
+    amounts = quantities * prices
+
+    # 수량이 있는 행만 표시 순서대로 선택
+    order = catalog.display_order
+    selected = order[quantities[order] > 0]
+
+    items = [
+        {
+            "항목코드": code,
+            "품목명": name,
+            "단위": unit,
+            "수량": qty,
+            "단가": price,
+            "금액": amount
+        }
+        for code, name, unit, qty, price, amount in zip(
+            catalog.arrays['항목코드'][selected].tolist(),
+            catalog.arrays['품목명'][selected].tolist(),
+            catalog.arrays['단위'][selected].tolist(),
+            quantities[selected].tolist(),
+            prices[selected].tolist(),
+            amounts[selected].tolist()
+        )
+    ]
+    # 총액은 표시되는 항목 금액의 합계 (수량이 0 이하인 행은 포함하지 않음)
+    return items, int(amounts[selected].sum())
@@ -0,0 +1,332 @@
+# SQLite 쿼리 추적기 (느린 쿼리 로그 + EXPLAIN QUERY PLAN)
+#
+# 켜기: QUOTE_SQL_TRACE=1 (또는 DatabaseConfig(trace=True))
+# 보고서: python query_trace.py report [--stats sql_trace.json] [--slow-log sql_slow.jsonl] [--top 20]
+
+import argparse
+import atexit
+import collections
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+
+SQL_TRACE_ENABLED = os.environ.get("QUOTE_SQL_TRACE", "0") == "1"
+# 상세 기록(링 버퍼)에 남길 문장 비율
+SQL_TRACE_SAMPLE = float(os.environ.get("QUOTE_SQL_TRACE_SAMPLE", "0.01"))
+# 이 시간(ms) 이상 걸린 문장은 실행 계획과 함께 느린 쿼리 로그에 기록
+SQL_SLOW_MS = float(os.environ.get("QUOTE_SQL_SLOW_MS", "50"))
+SQL_TRACE_FILE = os.environ.get("QUOTE_SQL_TRACE_FILE", "sql_trace.json")
+SQL_SLOW_LOG = os.environ.get("QUOTE_SQL_SLOW_LOG", "sql_slow.jsonl")
+# 통계 파일 저장 간격(초)
+FLUSH_INTERVAL = 60
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql):
+    """통계 집계용 문장 키 (공백 정리)"""
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def params_shape(parameters):
+    """파라미터 값 대신 형태만 기록 (개인정보가 로그에 남지 않도록)"""
+    if parameters is None:
+        return "()"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+    return type(parameters).__name__
+
+
+class _Stats:
+    __slots__ = ('count', 'total', 'max', 'rows', 'slow')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.slow = 0
+
+
+class QueryTracer:
+    """문장별 누적 통계는 항상, 상세 기록은 표본만 링 버퍼에 보관
+
+    느린 문장은 문장당 한 번 EXPLAIN QUERY PLAN을 구해 느린 쿼리 로그(JSONL)에 기록합니다.
+    """
+    def __init__(self, sample_rate=SQL_TRACE_SAMPLE, slow_ms=SQL_SLOW_MS, buffer_size=1000,
+                 stats_file=SQL_TRACE_FILE, slow_log=SQL_SLOW_LOG):
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.stats_file = stats_file
+        self.slow_log = slow_log
+        self.samples = collections.deque(maxlen=buffer_size)
+        self.slow_queries = collections.deque(maxlen=200)
+        self._stats = {}
+        self._plans = {}
+        self._keys = {}  # 원문 SQL → 정리된 키 (정규식 비용을 문장당 한 번으로)
+        self._lock = threading.Lock()
+        self._last_flush = time.time()
+        self._records = 0
+
+    def record(self, connection, sql, parameters, seconds, rows):
+        """문장 한 번의 실행 결과 기록"""
+        key = self._keys.get(sql)
+        if key is None:
+            if len(self._keys) > 10000:
+                self._keys.clear()
+            key = self._keys[sql] = normalize_sql(sql)
+        elapsed_ms = seconds * 1000
+        slow = elapsed_ms >= self.slow_ms
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = _Stats()
+            stats.count += 1
+            stats.total += elapsed_ms
+            stats.rows += max(rows, 0)
+            if elapsed_ms > stats.max:
+                stats.max = elapsed_ms
+            if slow:
+                stats.slow += 1
+            if random.random() < self.sample_rate:
+                self.samples.append({'sql': key, 'params': params_shape(parameters),
+                                     'ms': elapsed_ms, 'rows': rows, 'at': time.time()})
+            # 저장 시각 확인은 100건마다 한 번만
+            self._records += 1
+            flush = False
+            if self._records % 100 == 0 and self.stats_file:
+                now = time.time()
+                if now - self._last_flush >= FLUSH_INTERVAL:
+                    self._last_flush = now
+                    flush = True
+        if slow:
+            self._log_slow(connection, key, sql, parameters, elapsed_ms, rows)
+        if flush:
+            self.flush()
+
+    def _explain(self, connection, key, sql, parameters):
+        """문장의 실행 계획 (문장별로 한 번만 조회)"""
+        plan = self._plans.get(key)
+        if plan is not None:
+            return plan
+        try:
+            # 추적 커서를 거치지 않도록 기본 Connection.execute 사용
+            rows = sqlite3.Connection.execute(connection, "EXPLAIN QUERY PLAN " + sql,
+                                              parameters if parameters is not None else ()).fetchall()
+            plan = [row[3] for row in rows]
+        except sqlite3.Error as e:
+            plan = [f"(실행 계획 조회 실패: {str(e)})"]
+        self._plans[key] = plan
+        return plan
+
+    def _log_slow(self, connection, key, sql, parameters, elapsed_ms, rows):
+        entry = {
+            'at': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'ms': round(elapsed_ms, 3),
+            'rows': rows,
+            'sql': key,
+            'params': params_shape(parameters),
+            'plan': self._explain(connection, key, sql, parameters),
+        }
+        self.slow_queries.append(entry)
+        if self.slow_log:
+            try:
+                with open(self.slow_log, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            except OSError as e:
+                print(f"느린 쿼리 로그 기록 중 오류 발생: {str(e)}")
+
+    def snapshot(self):
+        """문장별 누적 통계"""
+        with self._lock:
+            return {
+                key: {'count': stats.count, 'total_ms': stats.total, 'max_ms': stats.max,
+                      'rows': stats.rows, 'slow': stats.slow}
+                for key, stats in self._stats.items()
+            }
+
+    def flush(self):
+        """누적 통계를 stats_file에 저장 (같은 파일의 이전 통계와 합산하지 않고 덮어씀)"""
+        if not self.stats_file:
+            return
+        data = {'pid': os.getpid(), 'saved_at': time.time(), 'statements': self.snapshot()}
+        tmp_path = f"{self.stats_file}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.stats_file)
+        except OSError as e:
+            print(f"쿼리 통계 저장 중 오류 발생: {str(e)}")
+
+    def report(self, top=20):
+        """총 소요 시간 순 문장 목록 (텍스트)"""
+        return format_report(self.snapshot(), top)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._plans.clear()
+            self.samples.clear()
+            self.slow_queries.clear()
+
+
+class TracingCursor(sqlite3.Cursor):
+    """실행/결과 조회 시간을 합산해 QueryTracer에 기록하는 커서
+
+    SELECT는 결과를 가져오는 동안에도 SQLite가 작업하므로, fetch 시간까지 포함해
+    다음 execute/close 또는 결과를 모두 읽은 시점에 한 번 기록합니다.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pending = None  # [sql, parameters, seconds, rows]
+
+    def _finish(self):
+        pending = self._pending
+        if pending is not None:
+            self._pending = None
+            get_tracer().record(self.connection, *pending)
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        started = time.perf_counter()
+        try:
+            super().execute(sql, parameters)
+        finally:
+            self._pending = [sql, parameters, time.perf_counter() - started, 0]
+            if self.description is None:
+                # 결과 행이 없는 문장은 바로 기록 (rowcount: 변경된 행 수)
+                self._pending[3] = self.rowcount
+                self._finish()
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        started = time.perf_counter()
+        try:
+            super().executemany(sql, seq_of_parameters)
+        finally:
+            self._pending = [sql, None, time.perf_counter() - started, self.rowcount]
+            self._finish()
+        return self
+
+    def _fetched(self, started, rows, exhausted):
+        pending = self._pending
+        if pending is not None:
+            pending[2] += time.perf_counter() - started
+            pending[3] += rows
+            if exhausted:
+                self._finish()
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(started, 0 if row is None else 1, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(started, len(rows), not rows)
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(started, len(rows), True)
+        return rows
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        # conn.execute(...).fetchone()처럼 닫지 않고 버려진 커서
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+
+class TracingConnection(sqlite3.Connection):
+    """모든 문장을 TracingCursor로 실행하는 연결 (sqlite3.connect(factory=...)용)"""
+    def cursor(self, factory=TracingCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer():
+    """프로세스 공유 쿼리 추적기 (처음 사용할 때 생성, 종료 시 통계 저장)"""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = QueryTracer()
+                atexit.register(_tracer.flush)
+    return _tracer
+
+
+def format_report(statements, top=20):
+    """문장별 통계를 총 소요 시간 순으로 정리"""
+    ranked = sorted(statements.items(), key=lambda entry: entry[1]['total_ms'], reverse=True)[:top]
+    lines = [f"{'총 ms':>10} {'횟수':>8} {'평균 ms':>9} {'최대 ms':>9} {'행/회':>8} {'느림':>5}  SQL"]
+    for sql, stats in ranked:
+        count = stats['count'] or 1
+        lines.append(f"{stats['total_ms']:>10.1f} {stats['count']:>8} {stats['total_ms'] / count:>9.3f} "
+                     f"{stats['max_ms']:>9.3f} {stats['rows'] / count:>8.1f} {stats['slow']:>5}  {sql[:120]}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQL 추적 결과 보고서")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    report = subparsers.add_parser("report", help="문장별 총 소요 시간 순위")
+    report.add_argument("--stats", default=SQL_TRACE_FILE, help="누적 통계 파일")
+    report.add_argument("--slow-log", default=SQL_SLOW_LOG, help="느린 쿼리 로그 (JSONL)")
+    report.add_argument("--top", type=int, default=20, help="표시할 문장 수")
+    args = parser.parse_args()
+
+    if os.path.exists(args.stats):
+        with open(args.stats, encoding='utf-8') as f:
+            data = json.load(f)
+        print(f"[문장별 누적 통계] {args.stats} (pid {data['pid']}, "
+              f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(data['saved_at']))})")
+        print(format_report(data['statements'], args.top))
+    else:
+        print(f"누적 통계 파일이 없습니다: {args.stats}")
+
+    if os.path.exists(args.slow_log):
+        slow = collections.defaultdict(lambda: {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'plan': []})
+        with open(args.slow_log, encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                stats = slow[entry['sql']]
+                stats['count'] += 1
+                stats['total_ms'] += entry['ms']
+                stats['max_ms'] = max(stats['max_ms'], entry['ms'])
+                stats['plan'] = entry['plan']
+        print(f"\n[느린 쿼리] {args.slow_log}")
+        for sql, stats in sorted(slow.items(), key=lambda entry: entry[1]['total_ms'], reverse=True)[:args.top]:
+            print(f"- {stats['count']}회, 총 {stats['total_ms']:.1f}ms, 최대 {stats['max_ms']:.1f}ms: {sql[:200]}")
+            for step in stats['plan']:
+                print(f"    {step}")
+
+
+if __name__ == "__main__":
+    main()
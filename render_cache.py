@@ -0,0 +1,207 @@
+import datetime
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+from estimate_template import TEMPLATE_VERSION, EstimateTemplate, get_environment
+from metrics import metrics
+from pdf_renderer import RENDERER_VERSION
+
+RENDER_CACHE_ENABLED = os.environ.get("QUOTE_RENDER_CACHE", "1") != "0"
+RENDER_CACHE_DIR = os.environ.get("QUOTE_RENDER_CACHE_DIR", ".render_cache")
+RENDER_CACHE_MAX_BYTES = int(os.environ.get("QUOTE_RENDER_CACHE_MB", "256")) * 1024 * 1024
+
+# 문서 종류 → 파일 확장자
+KINDS = {'pdf': 'pdf', 'html': 'html'}
+
+
+def _template_signature(customer_info):
+    """HTML 견적서에 쓰일 템플릿 이름과 (파일 템플릿이면) 수정 시각"""
+    name = EstimateTemplate.template_for(customer_info)
+    filename = get_environment().get_template(name).filename
+    mtime = os.stat(filename).st_mtime_ns if filename and os.path.exists(filename) else None
+    return [name, mtime]
+
+
+def render_key(kind, customer_info, company_info, items, total):
+    """견적서 내용으로 만든 캐시 키 (정렬된 JSON의 SHA-256)
+
+    문서에 작성일/유효기간이 찍히므로 오늘 날짜도 키에 포함합니다.
+    """
+    payload = {
+        'kind': kind,
+        'customer_info': customer_info,
+        'company_info': company_info,
+        'items': items,
+        'total': total,
+        'date': datetime.date.today().isoformat(),
+    }
+    if kind == 'pdf':
+        payload['renderer_version'] = RENDERER_VERSION
+    else:
+        payload['template_version'] = TEMPLATE_VERSION
+        payload['template'] = _template_signature(customer_info)
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class RenderCache:
+    """렌더링된 PDF/HTML을 내용 해시로 저장하는 디스크 캐시
+
+    파일 수정 시각을 마지막 사용 시각으로 사용하며(조회 시 갱신), 전체 크기가 max_bytes를
+    넘으면 가장 오래 사용하지 않은 파일부터 삭제합니다. 여러 프로세스가 같은 폴더를 써도
+    파일은 원자적으로 교체되므로 깨진 파일을 읽지 않습니다.
+    폴더에 쓸 수 없으면 저장만 건너뛰므로(write_errors, render_cache.put 오류 지표) 렌더링은 계속됩니다.
+    """
+    def __init__(self, cache_dir=RENDER_CACHE_DIR, max_bytes=RENDER_CACHE_MAX_BYTES, enabled=RENDER_CACHE_ENABLED):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.enabled = enabled  # False면 조회/저장 없이 항상 새로 렌더링
+        self._lock = threading.Lock()
+        self._total_bytes = None  # 처음 저장할 때 폴더를 스캔해 계산
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.evictions = 0
+        self.write_errors = 0
+
+    def _path(self, kind, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.{KINDS[kind]}")
+
+    def get(self, kind, key):
+        """캐시된 문서 bytes 조회 (없으면 None)"""
+        if not self.enabled:
+            return None
+        path = self._path(kind, key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+            self.bytes_saved += len(data)
+        return data
+
+    def put(self, kind, key, data):
+        """문서 bytes 저장 후 크기 제한 적용 (저장 실패 시 건너뜀)"""
+        if not self.enabled:
+            return
+        path = self._path(kind, key)
+        started = time.perf_counter()
+        tmp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            # 읽기 전용/디스크 부족/폴더 없음: 캐시 저장만 건너뛰고 렌더링 결과는 그대로 반환
+            if tmp_path and os.path.exists(tmp_path):
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+            with self._lock:
+                self.write_errors += 1
+            metrics.observe("render_cache.put", time.perf_counter() - started, error=True)
+            return
+        metrics.observe("render_cache.put", time.perf_counter() - started)
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_size()
+            else:
+                self._total_bytes += len(data)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def get_or_render(self, kind, customer_info, company_info, items, total, render):
+        """캐시에 있으면 저장된 bytes를, 없으면 render()로 생성해 저장 후 반환"""
+        key = render_key(kind, customer_info, company_info, items, total)
+        data = self.get(kind, key)
+        if data is None:
+            data = render()
+            self.put(kind, key, data)
+        return data
+
+    def _entries(self):
+        """캐시 파일 목록 [(마지막 사용 시각, 크기, 경로)]"""
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith('.tmp'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+        return entries
+
+    def _scan_size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        """max_bytes의 90%가 될 때까지 오래된 파일 삭제 (잠금 안에서 호출)"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+        self._total_bytes = total
+
+    def stats(self):
+        """적중률/절약한 렌더링 bytes 통계"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'bytes_saved': self.bytes_saved,
+                'evictions': self.evictions,
+                'write_errors': self.write_errors,
+                'size_bytes': self._total_bytes if self._total_bytes is not None else self._scan_size(),
+                'max_bytes': self.max_bytes,
+            }
+
+    def clear(self):
+        """캐시 파일 전체 삭제"""
+        with self._lock:
+            for _, _, path in self._entries():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._total_bytes = 0
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_render_cache():
+    """프로세스 공유 렌더링 캐시"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = RenderCache()
+    return _cache
@@ -0,0 +1,157 @@
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from estimate_handler import EstimateHandler
+from render_cache import get_render_cache, render_key
+
+RENDER_WORKERS = int(os.environ.get("QUOTE_RENDER_WORKERS", "2"))
+# 처리되지 않은(대기/실행 중) 작업 최대 개수
+RENDER_QUEUE_LIMIT = int(os.environ.get("QUOTE_RENDER_QUEUE_LIMIT", "32"))
+# 완료된 작업 결과 보관 시간(초)
+RENDER_JOB_TTL = 600
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+_handler = None
+
+
+def _render(kind, customer_info, company_info, items, total):
+    """작업 프로세스에서 문서 생성 (프로세스당 EstimateHandler 하나를 재사용)"""
+    global _handler
+    if _handler is None:
+        _handler = EstimateHandler(render_cache=get_render_cache())
+    if kind == 'pdf':
+        return _handler.generate_pdf_bytes(customer_info, company_info, items, total)
+    return _handler.generate_html_bytes(customer_info, company_info, items, total)
+
+
+class RenderQueueFullError(Exception):
+    """대기 중인 렌더링 작업이 큐 한도를 넘은 경우"""
+
+
+class RenderJob:
+    """렌더링 작업 핸들"""
+    def __init__(self, job_id, kind, key, future):
+        self.job_id = job_id
+        self.kind = kind
+        self.key = key
+        self.future = future
+        self.submitted_at = time.time()
+        self.finished_at = None
+        future.add_done_callback(self._finished)
+
+    def _finished(self, future):
+        self.finished_at = time.time()
+
+    @property
+    def status(self):
+        if self.future.done():
+            return FAILED if self.future.exception() is not None else DONE
+        return RUNNING if self.future.running() else QUEUED
+
+    @property
+    def error(self):
+        """실패한 작업의 오류 메시지"""
+        if self.future.done() and self.future.exception() is not None:
+            return str(self.future.exception())
+        return None
+
+    def result(self, timeout=None):
+        """생성된 문서 bytes (완료될 때까지 대기)"""
+        return self.future.result(timeout)
+
+
+class RenderJobManager:
+    """PDF/HTML 생성을 프로세스 풀에서 처리하는 작업 관리자
+
+    Streamlit 세션들이 하나의 관리자를 공유하며, 세션은 작업 ID만 보관하고 상태를 조회합니다.
+    렌더링 캐시에 있는 문서는 풀을 거치지 않고 바로 완료된 작업으로 반환합니다.
+    """
+    def __init__(self, workers=RENDER_WORKERS, queue_limit=RENDER_QUEUE_LIMIT):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.render_cache = get_render_cache()
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            # 스레드가 많은 Streamlit 서버를 fork하지 않도록 spawn 사용
+            self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                             mp_context=multiprocessing.get_context('spawn'))
+        return self._pool
+
+    def _submit_to_pool(self, *args):
+        """풀에 작업 제출 (작업 프로세스가 죽어 풀이 망가졌으면 새 풀을 만들어 한 번 다시 시도, 잠금 안에서 호출)"""
+        try:
+            return self._get_pool().submit(_render, *args)
+        except BrokenProcessPool:
+            # 망가진 풀의 작업들은 이미 BrokenProcessPool로 실패 처리되어 있음
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            return self._get_pool().submit(_render, *args)
+
+    def _prune(self):
+        """보관 시간이 지난 완료 작업 정리 (잠금 안에서 호출)"""
+        expires = time.time() - RENDER_JOB_TTL
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.finished_at and job.finished_at < expires]:
+            del self._jobs[job_id]
+
+    def pending(self):
+        """대기/실행 중인 작업 수"""
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if not job.future.done())
+
+    def submit(self, kind, customer_info, company_info, items, total):
+        """렌더링 작업 등록 후 작업 ID 반환"""
+        key = render_key(kind, customer_info, company_info, items, total)
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._prune()
+            cached = self.render_cache.get(kind, key)
+            if cached is not None:
+                future = Future()
+                future.set_result(cached)
+            else:
+                pending = sum(1 for job in self._jobs.values() if not job.future.done())
+                if pending >= self.queue_limit:
+                    raise RenderQueueFullError(f"대기 중인 견적서 생성 작업이 너무 많습니다 ({pending}건)")
+                future = self._submit_to_pool(kind, customer_info, company_info, items, total)
+            self._jobs[job_id] = RenderJob(job_id, kind, key, future)
+        return job_id
+
+    def get(self, job_id):
+        """작업 조회 (없거나 만료되었으면 None)"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def shutdown(self, wait=True):
+        """프로세스 풀 종료"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=wait, cancel_futures=True)
+                self._pool = None
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_render_jobs():
+    """프로세스 공유 렌더링 작업 관리자"""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = RenderJobManager()
+    return _manager
@@ -0,0 +1,127 @@
+# 템플릿/PDF 레이아웃 변경 후 DB에 저장된 견적서를 일괄 재발행하는 명령
+#
+# 사용법: python rerender_archive.py [--db quotation.db] [--out 견적서_재발행] [--format pdf|html|both]
+#                                   [--finals] [--from 2024-01-01] [--to 2024-12-31] [--customer 고객사]
+#                                   [--workers 4] [--batch-size 200] [--timings timings.csv]
+
+import argparse
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from data_manager import DataManager
+from database import Database
+from document_worker import FORMATS, init_worker, render_to_files
+from pdf_renderer import FONT_FILE
+
+
+def _tasks(db, estimates, kinds, out_dir):
+    """estimate 목록을 load_estimates로 한 번에 불러와 렌더링 작업으로 변환"""
+    loaded = db.load_estimates(estimate_id for estimate_id, _, _ in estimates)
+    for (estimate_id, filename, total), (estimate_data, items) in zip(estimates, loaded):
+        if estimate_data is None:
+            continue
+        customer_info, company_info = DataManager.split_estimate_data(estimate_data)
+        items = DataManager.document_items(items)
+        if total is None:
+            total = sum(item['금액'] or 0 for item in items)
+        if isinstance(total, float) and total.is_integer():
+            total = int(total)
+        yield (estimate_id, filename or f"estimate_{estimate_id}", kinds,
+               customer_info, company_info, items, total, out_dir)
+
+
+def _percentile(sorted_values, ratio):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * ratio))]
+
+
+def rerender(db, out_dir, kinds, estimates, workers=None, batch_size=200,
+             font_file=FONT_FILE, progress=print):
+    """견적서 일괄 재발행 후 처리 통계 반환
+
+    batch_size 건씩 DB에서 불러와 프로세스 풀로 넘기며, 다음 배치는 이전 배치가 렌더링되는 동안 불러옵니다.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    stats = {'estimates': len(estimates), 'rendered': 0, 'failed': 0, 'bytes': 0,
+             'errors': [], 'timings': []}
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(font_file,)) as pool:
+        pending = []
+        for offset in range(0, len(estimates), batch_size):
+            batch = list(_tasks(db, estimates[offset:offset + batch_size], kinds, out_dir))
+            pending.append(pool.map(render_to_files, batch, chunksize=max(1, len(batch) // (workers * 4))))
+            # 최대 두 배치만 동시에 진행 (불러오기와 렌더링 겹치기)
+            if len(pending) > 1:
+                _collect(pending.pop(0), stats, started, progress)
+        for results in pending:
+            _collect(results, stats, started, progress)
+
+    stats['elapsed'] = time.perf_counter() - started
+    stats['docs_per_sec'] = stats['rendered'] / stats['elapsed'] if stats['elapsed'] else 0.0
+    return stats
+
+
+def _collect(results, stats, started, progress):
+    """배치 결과 집계 및 진행 상황 출력"""
+    for estimate_id, filename, elapsed, size, error in results:
+        stats['timings'].append((estimate_id, filename, elapsed, size, error))
+        if error:
+            stats['failed'] += 1
+            stats['errors'].append(f"{estimate_id} ({filename}): {error}")
+        else:
+            stats['rendered'] += 1
+            stats['bytes'] += size
+    done = stats['rendered'] + stats['failed']
+    elapsed = time.perf_counter() - started
+    progress(f"[{done}/{stats['estimates']}] {done / elapsed if elapsed else 0.0:.1f} 건/초")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DB에 저장된 견적서 PDF/HTML 일괄 재발행")
+    parser.add_argument("--db", default="quotation.db", help="SQLite DB 파일")
+    parser.add_argument("--out", default="견적서_재발행", help="재발행 문서 저장 폴더")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="pdf", help="생성할 문서 형식")
+    parser.add_argument("--finals", action="store_true", help="최종본만 재발행")
+    parser.add_argument("--from", dest="date_from", help="견적일자 시작 (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="date_to", help="견적일자 끝 (YYYY-MM-DD)")
+    parser.add_argument("--customer", help="고객사명 (부분 일치)")
+    parser.add_argument("--workers", type=int, default=None, help="렌더링 프로세스 수 (기본: CPU 수)")
+    parser.add_argument("--batch-size", type=int, default=200, help="DB에서 한 번에 불러올 건수")
+    parser.add_argument("--font", default=FONT_FILE, help="PDF 폰트(TTF) 파일")
+    parser.add_argument("--timings", help="문서별 소요 시간을 기록할 CSV 파일")
+    args = parser.parse_args()
+
+    db = Database(args.db)
+    estimates = db.find_estimates(finals_only=args.finals, customer=args.customer,
+                                  date_from=args.date_from, date_to=args.date_to)
+    print(f"재발행 대상: {len(estimates)}건")
+    stats = rerender(db, args.out, FORMATS[args.format], estimates, args.workers,
+                     args.batch_size, args.font)
+
+    timings = sorted(elapsed for _, _, elapsed, _, error in stats['timings'] if not error)
+    print(f"재발행: {stats['rendered']}건, 실패: {stats['failed']}건, "
+          f"{stats['bytes'] / 1024 / 1024:,.1f}MB")
+    if timings:
+        print(f"문서별 소요 시간(ms): 평균 {sum(timings) / len(timings) * 1000:.1f}, "
+              f"p50 {_percentile(timings, 0.5) * 1000:.1f}, p95 {_percentile(timings, 0.95) * 1000:.1f}, "
+              f"최대 {timings[-1] * 1000:.1f}")
+    print(f"소요 시간: {stats['elapsed']:.2f}초, 처리량: {stats['docs_per_sec']:.1f} 건/초")
+    for error in stats['errors'][:20]:
+        print(f"  - {error}")
+
+    if args.timings:
+        with open(args.timings, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            writer.writerow(['estimate_id', 'filename', 'elapsed_ms', 'bytes', 'error'])
+            for estimate_id, filename, elapsed, size, error in stats['timings']:
+                writer.writerow([estimate_id, filename, f"{elapsed * 1000:.2f}", size, error or ''])
+
+
+if __name__ == "__main__":
+    main()